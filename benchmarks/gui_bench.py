@@ -0,0 +1,282 @@
+"""Offscreen benchmarks of the GUI's heavy paths with synthetic API payloads
+
+python benchmarks/gui_bench.py [--results 100] [--chapters 5000] [--repeat 5] [--output gui_bench.json]
+
+Measures rendering search results, relaying them out on resize and filling
+the chapter list, plus widget counts and memory, and writes the numbers as
+JSON so runs before and after a change can be compared. No network is used.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import statistics
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QObject, QBuffer, QByteArray, pyqtSignal, QT_VERSION_STR
+from PyQt5.QtGui import QImage, QColor
+
+app = QApplication(sys.argv[:1])
+
+import ui
+from models import Manga, Chapter
+from progress import DownloadProgress
+from versions import resolve_versions
+
+RESIZE_SIZES = [(800, 600), (1280, 800), (1920, 1080), (1024, 768)]
+
+# Seconds to wait for the chapter dialog to load its synthetic feed
+LOAD_TIMEOUT = 30
+
+
+def make_manga(i):
+    return {
+        "id": f"manga-{i}",
+        "type": "manga",
+        "attributes": {
+            "title": {"en": f"Synthetic Manga {i}"},
+            "altTitles": [{"ja": f"合成漫画 {i}"}],
+            "description": {"en": "A long description. " * 40},
+            "tags": [{"attributes": {"name": {"en": tag}}} for tag in ("Action", "Comedy", "Drama", "Fantasy")],
+            "status": "ongoing",
+            "year": 2000 + i % 25,
+            "contentRating": "safe",
+        },
+        "relationships": [
+            {"type": "cover_art", "attributes": {"fileName": f"cover-{i}.jpg"}},
+            {"type": "author", "attributes": {"name": f"Author {i % 7}"}},
+        ],
+    }
+
+
+def make_chapter(i):
+    # Every tenth chapter is a second upload of the one before by another group, as in real feeds
+    number = str(i - 1 if i % 10 == 9 else i)
+    return {
+        "id": f"chapter-{i}",
+        "type": "chapter",
+        "attributes": {
+            "chapter": number,
+            "title": f"Chapter title {i}",
+            "volume": str(i // 50 + 1),
+            "translatedLanguage": "en",
+            "pages": 20 + i % 15,
+            "publishAt": f"20{10 + i % 15}-01-01T00:00:00+00:00",
+            "updatedAt": f"20{10 + i % 15}-01-01T00:00:00+00:00",
+        },
+        "relationships": [
+            {"type": "manga", "id": "manga-0"},
+            {"type": "scanlation_group", "id": f"group-{i % 3}", "attributes": {"name": f"Group {i % 3}"}},
+        ],
+    }
+
+
+def make_cover():
+    """JPEG bytes of a synthetic cover, served for every cover URL"""
+    image = QImage(512, 728, QImage.Format_RGB32)
+    image.fill(QColor("#ff6740"))
+    data = QByteArray()
+    buffer = QBuffer(data)
+    buffer.open(QBuffer.WriteOnly)
+    image.save(buffer, "JPEG", 85)
+    return bytes(data)
+
+
+class FakeAPI(QObject):
+    """The parts of MangadexAPI the GUI touches, answering from synthetic payloads"""
+    host_state_changed = pyqtSignal(str, str)
+    base_url = "https://api.mangadex.org"
+    
+    def __init__(self, results, chapters):
+        super().__init__()
+        self.results = results
+        self.chapters = chapters
+        self.progress = DownloadProgress()
+    
+    def search_manga(self, title, limit=20, offset=0, content_ratings=None):
+        return {"data": self.results[offset:offset + limit], "total": len(self.results)}
+    
+    def search_local(self, title, limit=20):
+        return {"data": []}
+    
+    def get_manga_chapters(self, manga_id, language="en"):
+        return {"data": self.chapters, "total": len(self.chapters)}
+    
+    def prefetch_at_home(self, chapter_ids, **kwargs):
+        return {}
+    
+    def _sanitize_filename(self, filename):
+        return filename
+
+
+class Settings(dict):
+    def get(self, key, default=None):
+        return super().get(key, default)
+    
+    def set(self, key, value):
+        self[key] = value
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def summarize(samples):
+    return {
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "max_ms": round(max(samples), 3),
+        "runs": len(samples),
+    }
+
+
+def widget_count():
+    return len(QApplication.allWidgets())
+
+
+def bench_search_results(window, results, repeat):
+    """Time showing a page of results until it is painted, then resizing the window"""
+    payload = {"data": [Manga.from_api(manga) for manga in results], "total": len(results)}
+    window.page_size = len(results)
+    window.prefetch_next_page = lambda: None  # Only the one page is measured
+    
+    render, relayout = [], {f"{w}x{h}": [] for w, h in RESIZE_SIZES}
+    for _ in range(repeat):
+        window.resize(*RESIZE_SIZES[0])
+        window.search_generation += 1
+        window.results_model.clear()
+        window.search_results = []
+        app.processEvents()
+        
+        def show_results():
+            window.display_search_results(window.search_generation, 0, payload)
+            app.processEvents()
+            window.grab()  # Paints the window, including every visible card
+        
+        render.append(timed(show_results))
+        
+        for width, height in RESIZE_SIZES[1:] + RESIZE_SIZES[:1]:
+            def resize():
+                window.resize(width, height)
+                app.processEvents()
+                window.arrange_cards()
+                window.grab()
+            
+            relayout[f"{width}x{height}"].append(timed(resize))
+    
+    return {
+        "results": len(results),
+        "render": summarize(render),
+        "relayout": {size: summarize(samples) for size, samples in relayout.items()},
+        "widgets": widget_count(),
+    }
+
+
+def bench_chapter_list(window, chapters, repeat):
+    """Time parsing and resolving a feed and filling the chapter dialog's list"""
+    parse, resolve, fill = [], [], []
+    dialog = None
+    for _ in range(repeat):
+        records = []
+        parse.append(timed(lambda: records.extend(Chapter.from_api(chapter) for chapter in chapters)))
+        versions = []
+        resolve.append(timed(lambda: versions.extend(resolve_versions(records))))
+        
+        if dialog is None:
+            dialog = ui.ChapterSelectionDialog(window.api, "manga-0", "en", window)
+            dialog.resize(700, 800)
+            dialog.show()
+            # Let the dialog's own feed load finish so it cannot replace the list being measured
+            deadline = time.monotonic() + LOAD_TIMEOUT
+            while dialog.chapter_model.rowCount() == 0:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"The chapter dialog did not fill its list within {LOAD_TIMEOUT}s; "
+                                       f"status: {dialog.status_label.text()!r}")
+                app.processEvents()
+                time.sleep(0.001)
+        
+        def fill_list():
+            dialog.update_chapters_ui(versions)
+            app.processEvents()
+            dialog.grab()
+        
+        fill.append(timed(fill_list))
+    
+    result = {
+        "chapters": len(chapters),
+        "parse": summarize(parse),
+        "resolve_versions": summarize(resolve),
+        "update_chapters_ui": summarize(fill),
+        "rows": dialog.chapter_model.rowCount(),
+        "widgets": widget_count(),
+    }
+    dialog.close()
+    return result
+
+
+def memory_info():
+    info = {}
+    current, peak = tracemalloc.get_traced_memory()
+    info["python_current_mb"] = round(current / 1024 / 1024, 2)
+    info["python_peak_mb"] = round(peak / 1024 / 1024, 2)
+    try:
+        import resource
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        info["max_rss_mb"] = round(maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 2)
+    except ImportError:
+        pass
+    return info
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the GUI offscreen with synthetic payloads")
+    parser.add_argument("--results", type=int, default=100, help="search results to render")
+    parser.add_argument("--chapters", type=int, default=5000, help="chapters in the synthetic feed")
+    parser.add_argument("--repeat", type=int, default=5, help="runs of each benchmark")
+    parser.add_argument("--output", default="gui_bench.json", help="JSON file to write")
+    args = parser.parse_args(argv)
+    
+    tracemalloc.start()
+    cover = make_cover()
+    ui.cover_cache.get = lambda url: cover
+    ui.cover_cache.prefetch = lambda urls: None
+    
+    results = [make_manga(i) for i in range(args.results)]
+    chapters = [make_chapter(i) for i in range(args.chapters)]
+    api = FakeAPI(results, chapters)
+    
+    with tempfile.TemporaryDirectory() as download_dir:
+        window = ui.MangadexGUI(api, Settings(download_dir=download_dir))
+        window.show()
+        app.processEvents()
+        report = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "qt": QT_VERSION_STR,
+            "platform": platform.platform(),
+            "qpa": os.environ.get("QT_QPA_PLATFORM"),
+            "widgets_at_start": widget_count(),
+            "search_results": bench_search_results(window, results, args.repeat),
+            "chapter_list": bench_chapter_list(window, chapters, args.repeat),
+            "memory": memory_info(),
+        }
+        window.close()
+    
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
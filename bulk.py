@@ -0,0 +1,273 @@
+"""Mirror many series at once: python bulk.py ids.txt [--workers N] [--output DIR] ...
+
+Each manga is downloaded by one of several worker processes, so PDF building
+and volume merging run on every core. All workers take their API and at-home
+requests from the same rate limiters, served by a manager process, so the
+whole run stays within MangaDex's limits. A JSON report of every manga is
+written to the output directory at the end.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import multiprocessing
+from multiprocessing.managers import BaseManager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from http_client import RateLimiter
+from settings import Settings
+
+# Same budgets as MangadexAPI, but for all worker processes together
+RATE_LIMITS = {
+    "api": (5, 1.0),
+    "at_home": (40, 60.0),
+}
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name):
+    """Rate limiter shared by all workers; runs in the manager process"""
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = RateLimiter(*RATE_LIMITS[name])
+        return _limiters[name]
+
+
+class LimiterManager(BaseManager):
+    pass
+
+
+LimiterManager.register("get_limiter", callable=get_limiter)
+
+_api = None
+_options = None
+
+
+def init_worker(address, authkey, options):
+    """Set up a worker process's API client with the shared rate limiters"""
+    global _api, _options
+    import http_client
+    from mangadex_api import MangadexAPI
+    
+    multiprocessing.current_process().authkey = authkey
+    manager = LimiterManager(address=address, authkey=authkey)
+    manager.connect()
+    
+    http_client.configure(http2=options["http2"])
+    postprocessor = None
+    if options["postprocess"]:
+        from postprocess import PostProcessor
+        # Every worker has its own pool; together they use about one process per core
+        postprocessor = PostProcessor(options["postprocess_width"], options["postprocess_format"],
+                                      options["postprocess_quality"], max_workers=options["postprocess_workers"])
+    _api = MangadexAPI(lean=options["lean_json"], dedup_store=options["dedup_store"], postprocessor=postprocessor)
+    _api.api_limiter = manager.get_limiter("api")
+    _api.at_home_limiter = manager.get_limiter("at_home")
+    _options = options
+
+
+def archive_manga(manga_id, details):
+    """Download every missing chapter of one manga in a worker; returns its report entry
+    
+    details is the manga's API record, looked up in batches before the workers start.
+    """
+    import requests
+    from models import Manga, Chapter
+    from versions import resolve_versions
+    
+    started = time.monotonic()
+    bytes_before = _api.progress.sample()["bytes"]
+    report = {"id": manga_id, "title": None, "directory": None, "chapters": 0, "skipped": 0,
+              "downloaded": 0, "failed": [], "error": None, "retry": False}
+    try:
+        title = Manga.from_api(details).title or manga_id
+        output_dir = _options["output_dir"]
+        report["title"] = title
+        report["directory"] = os.path.join(output_dir, _api._sanitize_filename(title))
+        
+        feed = _api.get_manga_chapters(manga_id, _options["language"])
+        versions = resolve_versions([Chapter.from_api(chapter) for chapter in feed.get("data", [])],
+                                    _options["preferred_groups"], _options["version_strategy"])
+        chapters = [v.chosen for v in versions if not v.chosen.external_url]
+        report["chapters"] = len(chapters)
+        
+        index = _api.get_download_index(title, output_dir, manga_id)
+        chapters = [chapter for chapter in chapters if not index.is_downloaded(chapter.number)]
+        report["skipped"] = report["chapters"] - len(chapters)
+        
+        _api.prefetch_at_home([chapter.id for chapter in chapters])
+        for chapter in chapters:
+            path = _api.download_chapter(chapter.id, title, output_dir, chapter, _options["as_pdf"])
+            if not path:
+                report["failed"].append(chapter.number)
+                continue
+            report["downloaded"] += 1
+            if _options["group_by_volume"]:
+                _api.add_to_volume(title, output_dir, chapter, path)
+    except requests.RequestException as e:
+        report["error"] = str(e)
+        report["retry"] = True
+    except Exception as e:
+        report["error"] = str(e)
+    
+    report["retry"] = report["retry"] or bool(report["failed"])
+    report["bytes"] = _api.progress.sample()["bytes"] - bytes_before
+    report["seconds"] = round(time.monotonic() - started, 2)
+    return report
+
+
+def get_details(manga_ids, options, api_limiter):
+    """Look up all manga in batches; returns (manga id -> API record, ids whose lookup failed)"""
+    import http_client
+    from mangadex_api import MangadexAPI
+    
+    http_client.configure(http2=options["http2"])
+    api = MangadexAPI(lean=options["lean_json"])
+    api.api_limiter = api_limiter
+    return api.get_manga_details_batch(manga_ids)
+
+
+def read_manga_ids(sources):
+    """Manga ids from the command line, or from files with one id per line ("#" starts a comment)"""
+    manga_ids = []
+    for source in sources:
+        if os.path.isfile(source):
+            with open(source, "r") as f:
+                for line in f:
+                    line = line.split("#")[0].strip()
+                    if line:
+                        manga_ids.append(line)
+        else:
+            manga_ids.append(source)
+    return list(dict.fromkeys(manga_ids))
+
+
+def run(manga_ids, options, workers=None):
+    """Archive manga on worker processes and write the merged report; returns the report"""
+    workers = workers or os.cpu_count()
+    started = time.time()
+    
+    # Spawn on every platform, so runs behave as they do on Windows, where fork does not exist
+    context = multiprocessing.get_context("spawn")
+    authkey = os.urandom(32)
+    manager = LimiterManager(authkey=authkey, ctx=context)
+    manager.start()
+    try:
+        entries = []
+        
+        def add_entry(entry):
+            entries.append(entry)
+            status = entry.get("error") or f"{entry.get('downloaded', 0)} downloaded, " \
+                                           f"{entry.get('skipped', 0)} already there, " \
+                                           f"{len(entry.get('failed', []))} failed"
+            print(f"[{len(entries)}/{len(manga_ids)}] {entry.get('title') or entry['id']}: {status}")
+        
+        # One /manga request per 100 ids instead of one per manga, under the shared API limit
+        details, lookup_failed = get_details(manga_ids, options, manager.get_limiter("api"))
+        lookup_failed = set(lookup_failed)
+        for manga_id in manga_ids:
+            if manga_id in lookup_failed:
+                add_entry({"id": manga_id, "error": "could not fetch manga details", "retry": True})
+            elif manga_id not in details:
+                add_entry({"id": manga_id, "error": "manga not found", "retry": False})
+        
+        found = [manga_id for manga_id in manga_ids if manga_id in details]
+        if found:
+            with ProcessPoolExecutor(max_workers=min(workers, len(found)), mp_context=context,
+                                     initializer=init_worker,
+                                     initargs=(manager.address, authkey, options)) as executor:
+                futures = {executor.submit(archive_manga, manga_id, details[manga_id]): manga_id
+                           for manga_id in found}
+                for future in as_completed(futures):
+                    try:
+                        entry = future.result()
+                    except Exception as e:
+                        entry = {"id": futures[future], "error": str(e), "retry": True}
+                    add_entry(entry)
+    finally:
+        manager.shutdown()
+    
+    # Report in the order the ids were given
+    order = {manga_id: i for i, manga_id in enumerate(manga_ids)}
+    entries.sort(key=lambda entry: order[entry["id"]])
+    report = {
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)),
+        "seconds": round(time.time() - started, 2),
+        "workers": workers,
+        "totals": {
+            "manga": len(entries),
+            "errors": sum(1 for entry in entries if entry.get("error")),
+            "chapters_downloaded": sum(entry.get("downloaded", 0) for entry in entries),
+            "chapters_failed": sum(len(entry.get("failed", [])) for entry in entries),
+            "bytes": sum(entry.get("bytes", 0) for entry in entries),
+            "to_retry": sum(1 for entry in entries if entry.get("retry")),
+        },
+        "manga": entries,
+    }
+    
+    report_path = os.path.join(options["output_dir"], "bulk-report.json")
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {report_path}")
+    
+    # Manga that hit network or rate-limit errors, as input for another run
+    retry_ids = [entry["id"] for entry in entries if entry.get("retry")]
+    retry_path = os.path.join(options["output_dir"], "bulk-retry.txt")
+    if retry_ids:
+        with open(retry_path, "w") as f:
+            f.write("\n".join(retry_ids) + "\n")
+        print(f"{len(retry_ids)} manga to retry written to {retry_path}")
+    elif os.path.exists(retry_path):
+        os.remove(retry_path)
+    return report
+
+
+
+def main(argv=None):
+    settings = Settings()
+    parser = argparse.ArgumentParser(description="Download many series on several processes")
+    parser.add_argument("manga", nargs="+", help="manga ids, or files with one id per line")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--output", default=settings.get("download_dir"), help="download directory")
+    parser.add_argument("--language", default=settings.get("preferred_language", "en"))
+    parser.add_argument("--pdf", action="store_true", default=settings.get("download_as_pdf", False),
+                        help="save chapters as PDF")
+    parser.add_argument("--volumes", action="store_true", default=settings.get("group_by_volume", False),
+                        help="also merge chapters into volume archives")
+    parser.add_argument("--postprocess", action="store_true", default=settings.get("postprocess", False),
+                        help="resize and re-encode pages as set in settings.json")
+    args = parser.parse_args(argv)
+    
+    manga_ids = read_manga_ids(args.manga)
+    if not manga_ids:
+        parser.error("no manga ids given")
+    os.makedirs(args.output, exist_ok=True)
+    workers = min(args.workers, len(manga_ids)) or 1
+    
+    options = {
+        "output_dir": args.output,
+        "language": args.language,
+        "as_pdf": args.pdf,
+        "group_by_volume": args.volumes,
+        "preferred_groups": settings.get("preferred_groups", []),
+        "version_strategy": settings.get("version_strategy", "newest"),
+        "lean_json": settings.get("lean_json", True),
+        "http2": settings.get("http2", False),
+        "dedup_store": settings.get("dedup_store", False),
+        "postprocess": args.postprocess,
+        "postprocess_width": settings.get("postprocess_width", 1200),
+        "postprocess_format": settings.get("postprocess_format", "webp"),
+        "postprocess_quality": settings.get("postprocess_quality", 80),
+        "postprocess_workers": max(os.cpu_count() // workers, 1),
+    }
+    report = run(manga_ids, options, workers)
+    return 1 if report["totals"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    # Spawned workers of a frozen build start here
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,45 @@
+import threading
+
+
+class DownloadCancelled(Exception):
+    """Raised inside the download pipeline once its DownloadControl was cancelled"""
+
+
+class DownloadControl:
+    """Pause/resume/cancel token shared by a download thread and the code it runs
+
+    Long-running steps call check() between units of work (chunks, pages,
+    chapters): it returns at once while running, blocks while paused and
+    raises DownloadCancelled after cancel().
+    """
+
+    def __init__(self):
+        self.running = threading.Event()
+        self.running.set()
+        self.cancelled = False
+
+    def pause(self):
+        self.running.clear()
+
+    def resume(self):
+        self.running.set()
+
+    def cancel(self):
+        self.cancelled = True
+        self.running.set()  # Wake up a paused thread so it can stop
+
+    @property
+    def is_paused(self):
+        return not self.running.is_set()
+
+    def should_stop(self):
+        """True when the current transfer should let go of its connection"""
+        return self.cancelled or self.is_paused
+
+    def check(self):
+        """Block while paused; raise DownloadCancelled once cancelled"""
+        if self.cancelled:
+            raise DownloadCancelled()
+        self.running.wait()
+        if self.cancelled:
+            raise DownloadCancelled()
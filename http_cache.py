@@ -0,0 +1,193 @@
+import os
+import json
+import time
+import zlib
+import hashlib
+import tempfile
+import threading
+from urllib.parse import urlencode
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+class HTTPCache:
+    """Persistent, size-bounded cache of API GET responses
+    
+    Fresh entries are served without a request; stale entries are revalidated
+    with If-None-Match/If-Modified-Since when the server sent an ETag or
+    Last-Modified header.
+    """
+    
+    def __init__(self, cache_dir=None, max_size=50 * 1024 * 1024, default_ttl=300):
+        self.cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "http")
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.lock = threading.Lock()
+        self.total_size = None  # Computed on first write
+        os.makedirs(self.cache_dir, exist_ok=True)
+    
+    def make_key(self, url, params=None):
+        """Build a cache key from the URL and params, independent of their order"""
+        items = []
+        for key, value in (params or {}).items():
+            values = value if isinstance(value, (list, tuple)) else [value]
+            items.extend((key, str(v)) for v in values)
+        query = urlencode(sorted(items))
+        normalized = f"{url.rstrip('/')}?{query}" if query else url.rstrip('/')
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+    
+    def get(self, key):
+        """Get a cache entry, or None if there is none"""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            return None
+        
+        header, _, body = data.partition(b"\n")
+        try:
+            entry = json.loads(header)
+        except ValueError:
+            return None
+        entry["body"] = body
+        
+        # Touch the file so eviction removes the least recently used entries first
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+    
+    def is_fresh(self, entry):
+        return entry["expires"] > time.time()
+    
+    def can_revalidate(self, entry):
+        headers = entry.get("headers", {})
+        return "etag" in headers or "last-modified" in headers
+    
+    def conditional_headers(self, entry):
+        """Headers that ask the server to answer 304 if the entry is still valid"""
+        headers = {}
+        if "etag" in entry.get("headers", {}):
+            headers["If-None-Match"] = entry["headers"]["etag"]
+        if "last-modified" in entry.get("headers", {}):
+            headers["If-Modified-Since"] = entry["headers"]["last-modified"]
+        return headers
+    
+    def put(self, key, response, ttl=None):
+        """Store a successful response unless the server forbids it"""
+        cache_control = response.headers.get("Cache-Control", "").lower()
+        if "no-store" in cache_control:
+            return
+        
+        entry = {
+            "url": response.url,
+            "status": response.status_code,
+            "headers": {name: response.headers[name] for name in ("etag", "last-modified", "content-type")
+                        if name in response.headers},
+            "expires": time.time() + self._get_ttl(cache_control, ttl),
+        }
+        self._write(key, entry, response.content)
+    
+    def refresh(self, key, entry, response, ttl=None):
+        """Extend an entry's lifetime after the server answered 304 Not Modified"""
+        cache_control = response.headers.get("Cache-Control", "").lower()
+        for name in ("etag", "last-modified"):
+            if name in response.headers:
+                entry["headers"][name] = response.headers[name]
+        entry["expires"] = time.time() + self._get_ttl(cache_control, ttl)
+        body = entry.pop("body")
+        self._write(key, entry, body)
+        entry["body"] = body
+    
+    def to_response(self, entry):
+        """Build a requests.Response from a cache entry"""
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.url = entry["url"]
+        response.headers = CaseInsensitiveDict(entry.get("headers", {}))
+        response.encoding = "utf-8"
+        response._content = entry["body"]
+        response.from_cache = True
+        return response
+    
+    def clear(self):
+        with self.lock:
+            for name in os.listdir(self.cache_dir):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+            self.total_size = 0
+    
+    def _get_ttl(self, cache_control, ttl):
+        for directive in cache_control.split(","):
+            name, _, value = directive.strip().partition("=")
+            if name == "max-age" and value.isdigit():
+                return int(value)
+        return self.default_ttl if ttl is None else ttl
+    
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.bin")
+    
+    def _write(self, key, entry, body):
+        data = zlib.compress(json.dumps(entry).encode("utf-8") + b"\n" + body)
+        path = self._path(key)
+        
+        with self.lock:
+            if self.total_size is None:
+                self.total_size = self._scan_size()
+            try:
+                old_size = os.path.getsize(path)
+            except OSError:
+                old_size = 0
+            
+            # A unique temporary file, as bulk worker processes share the cache directory
+            temp_path = None
+            try:
+                fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.cache_dir)
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            except OSError as e:
+                print(f"Error writing cache entry: {e}")
+                if temp_path and os.path.exists(temp_path):
+                    os.remove(temp_path)
+                return
+            
+            self.total_size += len(data) - old_size
+            if self.total_size > self.max_size:
+                self._evict()
+    
+    def _scan_size(self, stale_temp_age=60 * 60):
+        """Total size of the cache entries; temporary files left by a crash are removed"""
+        total = 0
+        now = time.time()
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".bin"):
+                    total += entry.stat().st_size
+                elif entry.name.endswith(".tmp") and now - entry.stat().st_mtime > stale_temp_age:
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+        return total
+    
+    def _evict(self):
+        """Remove least recently used entries until the cache is at 90% of its size limit"""
+        with os.scandir(self.cache_dir) as entries:
+            files = [(entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                     for entry in entries if entry.name.endswith(".bin")]
+        files.sort()
+        
+        target = self.max_size * 0.9
+        for _, size, path in files:
+            if self.total_size <= target:
+                break
+            try:
+                os.remove(path)
+                self.total_size -= size
+            except OSError:
+                pass
@@ -0,0 +1,518 @@
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import timedelta
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from profiling import profiler
+
+# urllib3 and httpx only decode brotli responses when a brotli package is installed
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "br, gzip, deflate"
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = "br, gzip, deflate"
+    except ImportError:
+        ACCEPT_ENCODING = "gzip, deflate"
+
+# httpx with the h2 package enables HTTP/2 multiplexing; without them requests over HTTP/1.1 is used
+try:
+    import httpx
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class RateLimiter:
+    """Thread-safe token bucket allowing `rate` requests every `per` seconds"""
+    
+    def __init__(self, rate, per=1.0):
+        self.rate = rate
+        self.per = per
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a request may be made"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) * self.per / self.rate
+            time.sleep(wait)
+
+
+class HostStats:
+    """Recent latency of one host, used to pick timeouts and hedge slow fetches"""
+    
+    def __init__(self, max_samples=50):
+        self.first_byte_times = deque(maxlen=max_samples)
+        self.lock = threading.Lock()
+    
+    def record(self, first_byte_time):
+        with self.lock:
+            self.first_byte_times.append(first_byte_time)
+    
+    def percentile(self, samples, fraction, min_samples=10):
+        with self.lock:
+            if len(samples) < min_samples:
+                return None
+            ordered = sorted(samples)
+        return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+    
+    def get_timeout(self, connect_timeout=5, default_read_timeout=30, min_read_timeout=5, max_read_timeout=60):
+        """(connect, read) timeout: read allows several times the usual wait for the first byte"""
+        p95 = self.percentile(self.first_byte_times, 0.95)
+        if p95 is None:
+            return (connect_timeout, default_read_timeout)
+        return (connect_timeout, min(max(p95 * 4 + 1, min_read_timeout), max_read_timeout))
+    
+    def get_hedge_delay(self):
+        """How long to wait for the response headers before sending a second, hedged request"""
+        return self.percentile(self.first_byte_times, 0.95)
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of sending a request to a host whose circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Stops sending requests to a host after repeated failures and probes it again after a cooldown
+    
+    States: "closed" (requests flow), "open" (requests fail fast) and
+    "half_open" (a single probe request is let through).
+    """
+    
+    def __init__(self, host, failure_threshold=5, cooldown=30, max_cooldown=300, on_state_change=None):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.on_state_change = on_state_change
+        self.state = "closed"
+        self.failures = 0
+        self.retry_at = 0
+        self.lock = threading.RLock()
+        self.state_changed = threading.Condition(self.lock)
+    
+    def allow(self):
+        """Whether a request may be sent now"""
+        with self.lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() >= self.retry_at:
+                self._set_state("half_open")
+                return True
+            return False  # Open, or a probe is already in flight
+    
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.cooldown = self.base_cooldown
+            if self.state != "closed":
+                self._set_state("closed")
+    
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == "half_open":
+                # The probe failed, back off longer before the next one
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                self._open()
+            elif self.state == "closed" and self.failures >= self.failure_threshold:
+                self._open()
+    
+    def seconds_until_retry(self):
+        with self.lock:
+            if self.state != "open":
+                return 0
+            return max(self.retry_at - time.monotonic(), 0)
+    
+    def is_available(self):
+        """Whether a request would be let through now, as a normal request or as the probe"""
+        with self.lock:
+            return self.state == "closed" or (self.state == "open" and time.monotonic() >= self.retry_at)
+    
+    def wait_for_probe(self, timeout=None):
+        """Block while a probe request is in flight, returning the state it left the breaker in"""
+        with self.state_changed:
+            self.state_changed.wait_for(lambda: self.state != "half_open", timeout)
+            return self.state
+    
+    def _open(self):
+        self.retry_at = time.monotonic() + self.cooldown
+        self._set_state("open")
+    
+    def _set_state(self, state):
+        self.state = state
+        self.state_changed.notify_all()
+        if self.on_state_change:
+            self.on_state_change(self.host, state)
+
+
+class HTTP2Body:
+    """File-like view of a streamed httpx response body, read by requests' iter_content()"""
+    
+    def __init__(self, result):
+        self.result = result
+        self.chunks = None
+    
+    def read(self, amt=None):
+        """Next chunk of the body, of up to about amt bytes; b"" at the end"""
+        try:
+            if self.chunks is None:
+                self.chunks = self.result.iter_bytes(amt)
+            return next(self.chunks, b"")
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e))
+        except httpx.HTTPError as e:
+            raise requests.ConnectionError(str(e))
+    
+    def close(self):
+        self.result.close()
+
+
+class HTTPClient:
+    """Shared HTTP client for API calls, page images and covers
+    
+    Keeps pooled connections per host, applies adaptive timeouts and per-host
+    circuit breakers, and optionally multiplexes requests over HTTP/2.
+    """
+    
+    # Connection pool size per host; at-home nodes serve many pages in parallel
+    POOL_SIZES = {
+        "api.mangadex.org": 10,
+        "uploads.mangadex.org": 8,
+    }
+    DEFAULT_POOL_SIZE = 16
+    
+    def __init__(self, http2=False, page_workers=4):
+        self.session = self._create_session()
+        self.http2_client = None
+        if http2 and HTTP2_AVAILABLE:
+            self.http2_client = httpx.Client(
+                http2=True,
+                headers={"Accept-Encoding": ACCEPT_ENCODING},
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            )
+        elif http2:
+            print("HTTP/2 requested but httpx[http2] is not installed, using HTTP/1.1")
+        
+        self.lock = threading.Lock()
+        self.host_stats = {}
+        self.circuit_breakers = {}
+        self.state_listeners = []
+        # Every page worker can have a request and its hedge in flight, so neither waits for a thread
+        self.hedge_executor = ThreadPoolExecutor(max_workers=2 * page_workers)
+    
+    def add_state_listener(self, listener):
+        """Call listener(host, state) whenever a host's circuit breaker changes state"""
+        self.state_listeners.append(listener)
+    
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+    
+    def request(self, method, url, rate_limiter=None, max_rate_limit_retries=2, max_retries=3, **kwargs):
+        """Send a request, failing fast while the host's circuit breaker is open
+        
+        Rate-limited responses (429) are retried after the server's Retry-After.
+        Connection errors, timeouts and 5xx responses are retried up to max_retries
+        times with exponential backoff, unless they opened the circuit.
+        """
+        breaker = self.get_circuit_breaker(url)
+        host_stats = self.get_host_stats(url)
+        
+        # Every request gets connect and read timeouts based on how the host has been doing
+        kwargs.setdefault("timeout", host_stats.get_timeout())
+        
+        retries = 0
+        while True:
+            if not breaker.allow():
+                raise CircuitOpenError(f"{breaker.host} is unavailable, retrying in "
+                                       f"{breaker.seconds_until_retry():.0f}s")
+            
+            if rate_limiter:
+                rate_limiter.acquire()
+            
+            try:
+                response = self._send(method, url, **kwargs)
+            except requests.RequestException as e:
+                breaker.record_failure()
+                if retries >= max_retries:
+                    raise
+                retries += 1
+                print(f"Connection error: {e}. Retrying...")
+                time.sleep(self._get_backoff(retries))
+                continue
+            
+            if not kwargs.get("stream"):
+                # Streamed bodies are recorded by whoever reads them
+                host_stats.record(response.elapsed.total_seconds())
+            if response.status_code >= 500:
+                breaker.record_failure()
+                if retries < max_retries:
+                    retries += 1
+                    response.close()
+                    time.sleep(self._get_backoff(retries))
+                    continue
+            else:
+                breaker.record_success()
+            
+            if response.status_code == 429 and max_rate_limit_retries > 0:
+                max_rate_limit_retries -= 1
+                time.sleep(self._get_retry_after(response))
+                continue
+            return response
+    
+    def fetch_hedged(self, url, rate_limiter=None, **kwargs):
+        """GET a URL, sending a second request if the first is unusually slow for its host
+        
+        The race is over the response headers: the hedge is sent once the first
+        request has waited longer than the host's p95 time to first byte. With
+        stream=True a body that stalls later is left to the read timeout.
+        Returns the first successful response, or None if both requests failed.
+        CircuitOpenError is raised if the host's circuit breaker turned the request away.
+        """
+        hedge_delay = self.get_host_stats(url).get_hedge_delay()
+        if hedge_delay is None:
+            # Not enough samples yet to tell what slow means for this host
+            try:
+                return self.get(url, rate_limiter=rate_limiter, **kwargs)
+            except CircuitOpenError:
+                raise
+            except requests.RequestException as e:
+                print(f"Error downloading {url}: {e}")
+                return None
+        
+        pending = {self.hedge_executor.submit(self.get, url, rate_limiter=rate_limiter, **kwargs)}
+        done, _ = wait(pending, timeout=hedge_delay)
+        if not done:
+            pending.add(self.hedge_executor.submit(self.get, url, rate_limiter=rate_limiter, **kwargs))
+        
+        # First successful response wins; the other request is left to finish on its own
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except CircuitOpenError:
+                    if not pending:
+                        raise
+                    continue
+                except requests.RequestException as e:
+                    print(f"Error downloading {url}: {e}")
+                    continue
+                if response.status_code in (200, 206) or not pending:
+                    for other in pending:
+                        other.add_done_callback(self._close_response)
+                    return response
+                response.close()
+        return None
+    
+    def download(self, url, path, rate_limiter=None, control=None, on_bytes=None, chunk_size=16 * 1024,
+                 max_resumes=2):
+        """Stream a URL to path through path + ".part", resuming a partial file with a Range request
+        
+        The file only gets its final name once complete. If control is paused the
+        connection is dropped right away and the transfer resumes from the bytes on
+        disk once it is resumed; DownloadCancelled is raised if it is cancelled.
+        on_bytes, if given, is called with the size of every chunk received.
+        A body that stalls until the read timeout, or ends early, is resumed from
+        the bytes on disk with a new, hedged request, up to max_resumes times.
+        Over HTTP/2 the body is streamed the same way, over the multiplexed connections.
+        Returns True once the file is complete, False if the download failed;
+        CircuitOpenError is raised if the host's circuit breaker turned it away.
+        """
+        part_path = f"{path}.part"
+        host_stats = self.get_host_stats(url)
+        
+        while True:
+            if control:
+                control.check()
+            
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            # Range offsets count encoded bytes, so ask for the file as it is stored
+            headers = {"Accept-Encoding": "identity"}
+            if offset:
+                headers["Range"] = f"bytes={offset}-"
+            
+            response = self.fetch_hedged(url, rate_limiter=rate_limiter, stream=True, headers=headers)
+            if response is None:
+                return False
+            
+            with response:
+                if response.status_code == 416 and offset:
+                    # The partial file is unusable, start over
+                    os.remove(part_path)
+                    continue
+                if response.status_code not in (200, 206):
+                    print(f"Error downloading {url}: HTTP {response.status_code}")
+                    return False
+                
+                # 200 means the server ignored the Range header and sends the whole file
+                received = 0
+                interrupted = False
+                write_time = 0.0
+                timed = profiler.enabled
+                try:
+                    with open(part_path, "ab" if response.status_code == 206 else "wb") as f:
+                        for chunk in response.iter_content(chunk_size):
+                            if timed:
+                                write_start = time.perf_counter()
+                                f.write(chunk)
+                                write_time += time.perf_counter() - write_start
+                            else:
+                                f.write(chunk)
+                            received += len(chunk)
+                            if on_bytes:
+                                on_bytes(len(chunk))
+                            if control and control.should_stop():
+                                interrupted = True
+                                break
+                except requests.RequestException as e:
+                    if not max_resumes:
+                        print(f"Error downloading {url}: {e}")
+                        return False  # The partial file is kept for the next attempt
+                    max_resumes -= 1
+                    print(f"Error downloading {url}: {e}. Resuming...")
+                    interrupted = True
+                finally:
+                    if timed:
+                        profiler.record("file_write", write_time)
+            
+            if interrupted:
+                continue  # Wait in control.check(), then resume from the bytes written so far
+            
+            expected = response.headers.get("Content-Length")
+            if expected and expected.isdigit() and received < int(expected):
+                if not max_resumes:
+                    print(f"Error downloading {url}: connection closed early")
+                    return False
+                max_resumes -= 1
+                continue
+            
+            host_stats.record(response.elapsed.total_seconds())
+            os.replace(part_path, path)
+            return True
+    
+    def get_host_stats(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            if host not in self.host_stats:
+                self.host_stats[host] = HostStats()
+            return self.host_stats[host]
+    
+    def get_circuit_breaker(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            if host not in self.circuit_breakers:
+                self.circuit_breakers[host] = CircuitBreaker(host, on_state_change=self._notify_state_change)
+            return self.circuit_breakers[host]
+    
+    def _close_response(self, future):
+        try:
+            future.result().close()
+        except requests.RequestException:
+            pass
+    
+    def _notify_state_change(self, host, state):
+        for listener in self.state_listeners:
+            listener(host, state)
+    
+    def _send(self, method, url, **kwargs):
+        if self.http2_client is not None and method == "GET":
+            return self._send_http2(method, url, **kwargs)
+        return self.session.request(method, url, **kwargs)
+    
+    def _send_http2(self, method, url, params=None, headers=None, timeout=None, stream=False, **kwargs):
+        """Send a request over HTTP/2 and return it as a requests.Response
+        
+        With stream=True only the headers are read; the body is read through
+        the response's iter_content(), as with requests.
+        """
+        connect_timeout, read_timeout = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        start = time.monotonic()
+        try:
+            request = self.http2_client.build_request(
+                method, url, params=params, headers=headers,
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            )
+            result = self.http2_client.send(request, stream=stream)
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e))
+        except httpx.HTTPError as e:
+            raise requests.ConnectionError(str(e))
+        
+        response = requests.Response()
+        response.status_code = result.status_code
+        response.headers = CaseInsensitiveDict(result.headers)
+        response.url = str(result.url)
+        response.encoding = result.encoding
+        if stream:
+            # httpx only knows the elapsed time once the body is read; this is the time to the headers
+            response.elapsed = timedelta(seconds=time.monotonic() - start)
+            response.raw = HTTP2Body(result)
+        else:
+            response.elapsed = result.elapsed if result.elapsed is not None else timedelta(0)
+            response._content = result.content
+        return response
+    
+    def _get_backoff(self, retry, base=0.5, maximum=8):
+        """Seconds to wait before the given retry of a failed request"""
+        return min(base * 2 ** (retry - 1), maximum)
+    
+    def _get_retry_after(self, response, default=1, maximum=60):
+        try:
+            return min(float(response.headers.get("Retry-After", default)), maximum)
+        except ValueError:
+            return default
+    
+    def _create_session(self):
+        """Create a requests session with connection pools sized per host"""
+        session = requests.Session()
+        # Ask for compressed responses explicitly; feed and search JSON shrinks several times
+        session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        # Retries are handled in request() so they can go through the circuit breaker
+        default_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=self.DEFAULT_POOL_SIZE, max_retries=0)
+        session.mount("http://", default_adapter)
+        session.mount("https://", default_adapter)
+        for host, pool_size in self.POOL_SIZES.items():
+            session.mount(f"https://{host}/", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0))
+        return session
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def configure(http2=False, page_workers=4):
+    """Create the shared client; call before the first get_client() to change its options
+    
+    page_workers is the number of pages downloaded at once, which sizes the hedging pool.
+    """
+    global _client
+    with _client_lock:
+        _client = HTTPClient(http2=http2, page_workers=page_workers)
+    return _client
+
+
+def get_client():
+    """Get the client shared by the API and the UI"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HTTPClient()
+        return _client
@@ -0,0 +1,180 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QObject, QFileSystemWatcher, pyqtSignal
+from models import DownloadIndex
+
+
+class LibraryScanner(QObject):
+    """In-memory view of the chapters in the download directory, kept up to date in the background
+    
+    The directory is walked once with os.scandir, stat-ing the manga folders in
+    parallel. Later scans only list chapter folders whose mtime changed. Manga
+    folders with chapters are watched, so new or removed chapters are picked up right away;
+    pages added inside a chapter folder are picked up by rescan(manga_title).
+    """
+    manga_scanned = pyqtSignal(str)  # Manga folder name, or "" after a scan of the whole library
+    
+    def __init__(self, api, root=None, max_workers=8):
+        super().__init__()
+        self.api = api
+        self.root = root
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self.folders = {}  # Manga folder name -> {entry name: (mtime, page count, or None for a PDF)}
+        self.pending = set()  # Manga folder names to rescan; None rescans the whole library
+        self.scanning = False
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self.manga_scanned.connect(self.watch_folders)
+    
+    def set_root(self, root):
+        """Scan a new download directory, dropping what was known about the old one"""
+        with self.lock:
+            self.root = root
+            self.folders = {}
+            self.pending = set()
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+        self.rescan()
+    
+    def rescan(self, manga_title=None):
+        """Queue a background rescan of one manga's folder, or of the whole library"""
+        name = self.api._sanitize_filename(manga_title) if manga_title else None
+        with self.lock:
+            self.pending.add(name)
+            if self.scanning:
+                return
+            self.scanning = True
+        threading.Thread(target=self._scan_pending, daemon=True).start()
+    
+    def is_scanned(self, manga_title):
+        with self.lock:
+            return self.api._sanitize_filename(manga_title) in self.folders
+    
+    def get_download_index(self, manga_title, chapters=None):
+        """DownloadIndex of a manga from memory; chapters (Chapter records) give expected page counts
+        
+        A manga that was not scanned yet is scanned first, so call this off the GUI thread.
+        """
+        name = self.api._sanitize_filename(manga_title)
+        with self.lock:
+            entries = self.folders.get(name)
+            root = self.root
+        if entries is None and root:
+            entries = self._scan_manga(name, root)
+        
+        expected = {chapter.number: chapter.pages for chapter in chapters or ()}
+        index = DownloadIndex()
+        manga_dir = os.path.normpath(os.path.join(root or "", name))
+        for entry, (_, pages) in (entries or {}).items():
+            is_pdf = entry.endswith(".pdf")
+            stem = entry[:-len(".pdf")] if is_pdf else entry
+            chapter_num = stem.split(" - ")[0].replace("Chapter ", "").strip()
+            if is_pdf:
+                index.add(chapter_num, os.path.join(manga_dir, entry))
+            elif pages:
+                complete = not expected.get(chapter_num) or pages >= expected[chapter_num]
+                index.add(chapter_num, os.path.join(manga_dir, entry), complete)
+        return index
+    
+    def on_directory_changed(self, path):
+        with self.lock:
+            root = self.root
+        if root and os.path.normpath(path) == os.path.normpath(root):
+            self.rescan()
+        else:
+            self.rescan(os.path.basename(path))
+    
+    def watch_folders(self, name):
+        """Watch the library and its manga folders for added and removed chapters
+        
+        Only folders holding chapters are watched; the download directory may be
+        a general one such as ~/Downloads with many unrelated subfolders.
+        """
+        with self.lock:
+            root = self.root
+            names = [folder for folder in ([name] if name else self.folders) if self.folders.get(folder)]
+        if not root:
+            return
+        paths = [root] + [os.path.join(root, folder) for folder in names]
+        watched = set(self.watcher.directories())
+        new_paths = [path for path in paths if path not in watched and os.path.isdir(path)]
+        if new_paths:
+            self.watcher.addPaths(new_paths)
+    
+    def _scan_pending(self):
+        while True:
+            with self.lock:
+                if not self.pending or not self.root:
+                    self.scanning = False
+                    return
+                full = None in self.pending
+                names = set() if full else set(self.pending)
+                self.pending = set()
+                root = self.root
+            
+            if full:
+                self._scan_library(root)
+                self.manga_scanned.emit("")
+            else:
+                for name in names:
+                    self._scan_manga(name, root)
+                    self.manga_scanned.emit(name)
+    
+    def _scan_library(self, root):
+        try:
+            with os.scandir(root) as entries:
+                names = [entry.name for entry in entries if entry.is_dir() and not entry.name.startswith(".")]
+        except OSError as e:
+            print(f"Error scanning library: {e}")
+            return
+        
+        # Stat calls dominate on network shares; overlap them across manga folders
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(lambda name: self._scan_manga(name, root), names))
+        
+        with self.lock:
+            if self.root == root:
+                for name in set(self.folders) - set(names):
+                    del self.folders[name]
+    
+    def _scan_manga(self, name, root):
+        """Rescan one manga folder, listing only the chapter folders whose mtime changed"""
+        manga_dir = os.path.join(root, name)
+        with self.lock:
+            known = dict(self.folders.get(name, {}))
+        
+        entries = {}
+        try:
+            with os.scandir(manga_dir) as it:
+                for entry in it:
+                    if not entry.name.startswith("Chapter "):
+                        continue
+                    mtime = entry.stat().st_mtime
+                    if entry.is_dir():
+                        if entry.name in known and known[entry.name][0] == mtime:
+                            entries[entry.name] = known[entry.name]
+                        else:
+                            entries[entry.name] = (mtime, self._count_pages(entry.path))
+                    elif entry.name.endswith(".pdf"):
+                        entries[entry.name] = (mtime, None)
+        except FileNotFoundError:
+            with self.lock:
+                if self.root == root:
+                    self.folders.pop(name, None)
+            return {}
+        except OSError as e:
+            print(f"Error scanning {manga_dir}: {e}")
+            return known
+        
+        with self.lock:
+            if self.root == root:
+                self.folders[name] = entries
+        return entries
+    
+    def _count_pages(self, chapter_dir):
+        try:
+            return len(self.api._list_pages(chapter_dir))
+        except OSError:
+            return 0
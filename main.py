@@ -1,18 +1,45 @@
 import sys
+import argparse
+import multiprocessing
 from PyQt5.QtWidgets import QApplication
 from mangadex_api import MangadexAPI
 from ui import MangadexGUI
 from settings import Settings
+import http_client
+from postprocess import PostProcessor
+from profiling import profiler
 
 def main():
-    app = QApplication(sys.argv)
+    # Qt options are passed on to QApplication
+    parser = argparse.ArgumentParser(description="Mangadex Downloader")
+    parser.add_argument("--profile", action="store_true",
+                        help="time each download stage and write a report to the download folder")
+    parser.add_argument("--profile-cpu", action="store_true", help="with --profile, also run cProfile")
+    parser.add_argument("--profile-memory", action="store_true", help="with --profile, also trace allocations")
+    args, qt_args = parser.parse_known_args()
+    profiler.configure(args.profile, cpu=args.profile_cpu, memory=args.profile_memory)
+    
+    app = QApplication(sys.argv[:1] + qt_args)
     app.setStyle('Fusion')  # Use Fusion style for a consistent look
     
     # Initialize settings
     settings = Settings()
     
+    # Set up the HTTP client shared by the API and the UI
+    http_client.configure(http2=settings.get("http2", False), page_workers=settings.get("page_workers", 4))
+    
+    # Optionally shrink pages for e-readers as they are downloaded
+    postprocessor = None
+    if settings.get("postprocess", False):
+        postprocessor = PostProcessor(
+            settings.get("postprocess_width", 1200),
+            settings.get("postprocess_format", "webp"),
+            settings.get("postprocess_quality", 80)
+        )
+    
     # Initialize API
-    api = MangadexAPI()
+    api = MangadexAPI(lean=settings.get("lean_json", True), dedup_store=settings.get("dedup_store", False),
+                      postprocessor=postprocessor)
     
     # Create and show the GUI
     window = MangadexGUI(api, settings)
@@ -21,4 +48,6 @@ def main():
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
+    # In the frozen exe, spawned post-processing workers start here and must not open the GUI
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -1,23 +1,227 @@
 import requests
 import os
 import json
+import shutil
+import sqlite3
 import time
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from PyQt5.QtCore import QObject, pyqtSignal
+from http_cache import HTTPCache
+from http_client import RateLimiter, CircuitOpenError, get_client
+from models import Chapter, AtHomeServer, DownloadIndex
+from page_store import PageStore
+from postprocess import Manifest
+from volumes import VolumeArchiver, IMAGE_EXTENSIONS, page_order_key
+from download_control import DownloadCancelled
+from progress import DownloadProgress
+from metadata_index import MetadataIndex
+from profiling import profiler
+
+# orjson parses large feed and search payloads several times faster than the json module
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+# Fields the app uses; the lean mode drops everything else from API records
+MANGA_ATTRIBUTES = ("title", "altTitles", "description", "tags", "status", "year", "contentRating",
+                    "lastVolume", "lastChapter", "availableTranslatedLanguages")
+CHAPTER_ATTRIBUTES = ("chapter", "title", "volume", "translatedLanguage", "pages", "externalUrl",
+                      "publishAt", "readableAt", "createdAt", "updatedAt")
+# Suffixes of files that are still being written, which are not finished pages
+PARTIAL_SUFFIXES = (".part", ".tmp")
+# At-home base URLs are valid for about 15 minutes; looked-up servers are reused for less than that
+AT_HOME_TTL = 10 * 60
+
+RELATIONSHIP_ATTRIBUTES = {
+    "cover_art": ("fileName", "volume"),
+    "author": ("name",),
+    "artist": ("name",),
+    "scanlation_group": ("name",),
+}
+
+
+def _project_relationships(relationships):
+    projected = []
+    for relationship in relationships:
+        item = {"id": relationship.get("id"), "type": relationship.get("type")}
+        keep = RELATIONSHIP_ATTRIBUTES.get(relationship.get("type"))
+        if keep and "attributes" in relationship:
+            attrs = relationship["attributes"] or {}
+            item["attributes"] = {key: attrs.get(key) for key in keep}
+        projected.append(item)
+    return projected
+
+
+def project_manga(manga):
+    """Keep only the manga fields the app uses"""
+    attrs = manga.get("attributes", {})
+    projected_attrs = {key: attrs[key] for key in MANGA_ATTRIBUTES if key in attrs}
+    if isinstance(attrs.get("description"), dict):
+        projected_attrs["description"] = {lang: text for lang, text in attrs["description"].items() if lang == "en"}
+    projected_attrs["tags"] = [
+        {"id": tag.get("id"), "type": "tag",
+         "attributes": {"name": tag.get("attributes", {}).get("name", {}),
+                        "group": tag.get("attributes", {}).get("group")}}
+        for tag in attrs.get("tags", [])
+    ]
+    return {
+        "id": manga.get("id"),
+        "type": manga.get("type"),
+        "attributes": projected_attrs,
+        "relationships": _project_relationships(manga.get("relationships", [])),
+    }
+
+
+def project_chapter(chapter):
+    """Keep only the chapter fields the app uses"""
+    attrs = chapter.get("attributes", {})
+    return {
+        "id": chapter.get("id"),
+        "type": chapter.get("type"),
+        "attributes": {key: attrs[key] for key in CHAPTER_ATTRIBUTES if key in attrs},
+        "relationships": _project_relationships(chapter.get("relationships", [])),
+    }
+
+class SingleFlight:
+    """Lets concurrent callers asking for the same key share a single call"""
+    
+    class Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+    
+    def do(self, key, fn):
+        """Run fn, or wait for the identical call already in flight and return its result"""
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = self.Call()
+        
+        if not leader:
+            call.done.wait()
+            if call.error:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+        return call.result
+
+
+class ChapterJob:
+    """A chapter being downloaded: where it goes, its at-home server and which pages are done"""
+    
+    def __init__(self, chapter, manga_title, manga_dir, chapter_dir, folder_name, as_pdf=False, control=None):
+        self.chapter = chapter
+        self.manga_title = manga_title
+        self.manga_dir = manga_dir
+        self.chapter_dir = chapter_dir
+        self.folder_name = folder_name
+        self.as_pdf = as_pdf
+        self.control = control
+        self.server = None
+        self.pages = []  # Path of every page once it is on disk
+        self.completed = 0
+        self.aborted = False  # Set when no server is left; the remaining pages are left for a resume
+        self.result = None  # Set when the chapter was already downloaded
+        self.page_store = None
+        self.manifest = None
+        self.processing = []  # (page index, page file name, post-processing future)
+        self.lock = threading.Lock()
+        self.server_lock = threading.Lock()
+    
+    def page_done(self, page_index, path):
+        with self.lock:
+            if self.pages[page_index] is None:
+                self.completed += 1
+            self.pages[page_index] = path
+    
+    def pending_pages(self):
+        """Indexes of the pages that are not on disk yet"""
+        with self.lock:
+            return [page_index for page_index, path in enumerate(self.pages) if path is None]
+    
+    def add_processing(self, page_index, image, future):
+        with self.lock:
+            self.processing.append((page_index, image, future))
+
 
 class MangadexAPI(QObject):
-    download_progress = pyqtSignal(int, int, str, str)  # current, total, manga_title, chapter_title
     chapter_progress = pyqtSignal(int, int, str)   # current chapter, total chapters, manga_title
     download_complete = pyqtSignal(str)  # path
+    host_state_changed = pyqtSignal(str, str)  # host, circuit breaker state
     
-    def __init__(self):
+    def __init__(self, cache_dir=None, lean=False, dedup_store=False, postprocessor=None):
         super().__init__()
         self.base_url = "https://api.mangadex.org"
-        self.session = self._create_session()
+        
+        # Lean mode keeps only the fields the UI uses from manga and chapter records
+        self.lean = lean
+        
+        # Connection pools, timeouts and circuit breakers are shared with the UI
+        self.client = get_client()
+        self.client.add_state_listener(self.host_state_changed.emit)
+        
+        # Persistent cache of API JSON responses
+        self.http_cache = HTTPCache(cache_dir)
+        
+        # Identical GETs in flight at the same time share one request and parsed result
+        self.single_flight = SingleFlight()
+        
+        # MangaDex allows about 5 requests per second per IP, and 40 per minute for at-home servers
+        self.api_limiter = RateLimiter(5, 1.0)
+        self.at_home_limiter = RateLimiter(40, 60.0)
+        
+        # Manga metadata by id, filled by searches, details and batch fetches
+        self.manga_cache = {}
+        self.manga_cache_lock = threading.Lock()
+        
+        # At-home servers and page lists looked up ahead of downloads: chapter id -> (server, time)
+        self.at_home_servers = {}
+        self.at_home_lock = threading.Lock()
+        
+        # Full-text index of every manga seen, for instant and offline local searches
+        self.metadata_index = MetadataIndex(os.path.join(cache_dir, "metadata.db") if cache_dir else None)
+        
+        # Content-addressed page stores by download directory, if deduplication is enabled
+        self.dedup_store = dedup_store
+        self.page_stores = {}
+        self.page_stores_lock = threading.Lock()
+        
+        # Optional PostProcessor that resizes and re-encodes pages as they arrive, with one
+        # manifest per manga folder shared by all chapters being prepared or downloaded
+        self.postprocessor = postprocessor
+        self.manifests = {}
+        self.manifests_lock = threading.Lock()
+        
+        # Merges downloaded chapters into per-volume CBZ/PDF archives
+        self.volume_archiver = VolumeArchiver()
+        
+        # Page and byte counters of running downloads, sampled by the UI at a fixed rate
+        self.progress = DownloadProgress()
         
     def search_manga(self, title, limit=20, offset=0, content_ratings=None):
-        """Search for manga by title"""
+        """Search for manga by title
+        
+        If the request fails the result has no manga and an "error" entry, so
+        callers can tell a failed page from an empty one.
+        """
         url = f"{self.base_url}/manga"
         params = {
             "title": title,
@@ -30,48 +234,134 @@ class MangadexAPI(QObject):
         if content_ratings:
             params["contentRating[]"] = content_ratings
         
-        response = self._request_with_retry("GET", url, params=params)
-        if response.status_code == 200:
-            return response.json()
+        status_code, results = self._get_json(url, params=params, projection=project_manga)
+        if status_code == 200:
+            self._cache_manga(results.get("data", []))
+            return results
         else:
+            return {"data": [], "error": f"HTTP {status_code}" if status_code else "request failed"}
+    
+    def search_local(self, title, limit=20):
+        """Search the manga seen in earlier API responses, without a request"""
+        try:
+            return {"data": self.metadata_index.search(title, limit)}
+        except sqlite3.Error as e:
+            print(f"Error searching local index: {e}")
             return {"data": []}
     
     def get_manga_chapters(self, manga_id, language="en"):
-        """Get chapters for a manga"""
+        """Get all chapters for a manga, following the feed's pagination
+        
+        Raises requests.RequestException if any page of the feed could not be
+        fetched, rather than returning a partial or empty chapter list.
+        """
         url = f"{self.base_url}/manga/{manga_id}/feed"
-        params = {
-            "translatedLanguage[]": [language],
-            "limit": 100,
-            "order[chapter]": "asc",
-        }
+        limit = 500  # Maximum page size allowed by the feed endpoint
+        chapters = []
+        offset = 0
+        total = None
         
-        response = self._request_with_retry("GET", url, params=params)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return {"data": []}
+        while total is None or offset < total:
+            params = {
+                "translatedLanguage[]": [language],
+                "limit": limit,
+                "offset": offset,
+                "order[chapter]": "asc",
+                "includes[]": ["scanlation_group"],
+            }
+            
+            status_code, page = self._get_json(url, params=params, projection=project_chapter)
+            if status_code is None:
+                raise requests.ConnectionError(f"Could not fetch the chapter feed of {manga_id}")
+            if status_code != 200:
+                raise requests.HTTPError(f"Could not fetch the chapter feed of {manga_id}: HTTP {status_code}")
+            
+            chapters.extend(page.get("data", []))
+            total = page.get("total", 0)
+            offset += limit
+            
+            if not page.get("data"):
+                break
+        
+        return {"data": chapters, "total": len(chapters)}
+            
+    def get_chapter_updates(self, manga_ids, updated_since, languages=None, batch_size=100):
+        """Get chapters of many manga updated since a timestamp using batched /chapter queries
+        
+        updated_since is a UTC timestamp in the form YYYY-MM-DDTHH:MM:SS. Returns
+        (chapters, ids of the manga whose batch failed); the chapters of a failed
+        batch are left out entirely, so those manga can be checked again later.
+        """
+        url = f"{self.base_url}/chapter"
+        limit = 100
+        chapters = []
+        failed = []
+        
+        for i in range(0, len(manga_ids), batch_size):
+            batch = manga_ids[i:i + batch_size]
+            batch_chapters = []
+            since = updated_since
+            offset = 0
+            
+            while True:
+                params = {
+                    "manga[]": batch,
+                    "updatedAtSince": since,
+                    "limit": limit,
+                    "offset": offset,
+                    "order[updatedAt]": "asc",
+                    "includeFutureUpdates": "0",
+                    "includes[]": ["scanlation_group"],
+                    "contentRating[]": ["safe", "suggestive", "erotica", "pornographic"],
+                }
+                if languages:
+                    params["translatedLanguage[]"] = languages
+                
+                status_code, page = self._get_json(url, params=params, projection=project_chapter)
+                if status_code != 200:
+                    print(f"Error checking chapter updates: HTTP {status_code}")
+                    failed.extend(batch)
+                    batch_chapters = []
+                    break
+                
+                data = page.get("data", [])
+                batch_chapters.extend(data)
+                offset += limit
+                if not data or offset >= page.get("total", 0):
+                    break
+                
+                # The API refuses offsets past 10000, continue from the last update time instead
+                if offset + limit > 10000:
+                    since = data[-1].get("attributes", {}).get("updatedAt", since)[:19]
+                    offset = 0
             
+            chapters.extend(batch_chapters)
+        
+        # Moving the window can return a few chapters twice
+        return list({chapter.get("id"): chapter for chapter in chapters}.values()), failed
+    
     def get_downloaded_chapters(self, manga_title, output_dir, manga_id=None):
-        """Get a list of already downloaded chapters for a manga"""
-        downloaded_chapters = []
-        incomplete_chapters = []
+        """Get the sets of already downloaded and incomplete chapter numbers for a manga"""
+        index = self.get_download_index(manga_title, output_dir, manga_id)
+        return index.downloaded, index.incomplete
+    
+    def get_download_index(self, manga_title, output_dir, manga_id=None):
+        """Scan a manga's folder into a DownloadIndex of downloaded and incomplete chapters"""
+        index = DownloadIndex()
         
         # Get manga directory path
         manga_dir = os.path.normpath(os.path.join(output_dir, self._sanitize_filename(manga_title)))
         
         if not os.path.exists(manga_dir):
-            return downloaded_chapters, incomplete_chapters
+            return index
         
-        # Get chapter data from API if manga_id is provided
-        chapter_data_map = {}
+        # Get chapter records from API if manga_id is provided
+        chapters_by_num = {}
         if manga_id:
             try:
-                chapters = self.get_manga_chapters(manga_id)
-                for chapter in chapters.get("data", []):
-                    chapter_attrs = chapter.get("attributes", {})
-                    chapter_num = chapter_attrs.get("chapter", "Unknown")
-                    chapter_id = chapter.get("id")
-                    chapter_data_map[chapter_num] = chapter_id
+                for chapter_data in self.get_manga_chapters(manga_id).get("data", []):
+                    chapter = Chapter.from_api(chapter_data)
+                    chapters_by_num[chapter.number] = chapter
             except Exception as e:
                 print(f"Error getting chapter data from API: {e}")
             
@@ -81,59 +371,155 @@ class MangadexAPI(QObject):
             
             # Check if it's a chapter directory with images
             if os.path.isdir(item_path) and item.startswith("Chapter "):
-                if os.listdir(item_path):  # Has files
+                existing_files = self._list_pages(item_path)
+                if existing_files:  # Has finished pages
                     chapter_num = item.split(" - ")[0].replace("Chapter ", "").strip()
                     
                     # Check if chapter is complete
                     is_complete = True
-                    if chapter_num in chapter_data_map:
-                        chapter_id = chapter_data_map[chapter_num]
-                        try:
-                            url = f"{self.base_url}/at-home/server/{chapter_id}"
-                            response = self._request_with_retry("GET", url)
-                            
-                            if response.status_code == 200:
-                                chapter_data = response.json()
-                                expected_images = chapter_data["chapter"]["data"]
-                                total_expected = len(expected_images)
-                                
-                                # Check if all expected images are downloaded
-                                existing_files = os.listdir(item_path)
-                                is_complete = len(existing_files) >= total_expected
-                        except Exception:
-                            # If API check fails, assume it's complete if it has files
-                            is_complete = len(os.listdir(item_path)) > 0
+                    chapter = chapters_by_num.get(chapter_num)
+                    if chapter:
+                        total_expected = chapter.pages or self._get_expected_page_count(chapter.id)
+                        if total_expected:
+                            # Check if all expected images are downloaded
+                            is_complete = len(existing_files) >= total_expected
                     
-                    if is_complete:
-                        downloaded_chapters.append(chapter_num)
-                    else:
-                        incomplete_chapters.append(chapter_num)
+                    index.add(chapter_num, item_path, is_complete)
             
             # Check if it's a PDF file
             elif os.path.isfile(item_path) and item.endswith(".pdf") and item.startswith("Chapter "):
                 chapter_num = item.split(" - ")[0].replace("Chapter ", "").strip()
-                downloaded_chapters.append(chapter_num)
+                index.add(chapter_num, item_path)
                 
-        return downloaded_chapters, incomplete_chapters
+        return index
     
-    def get_manga_details(self, manga_id):
+    def _get_expected_page_count(self, chapter_id):
+        """Get a chapter's page count from its at-home server data, or None if unavailable"""
+        try:
+            server = self.get_at_home_server(chapter_id)
+            if server:
+                return len(server.data)
+        except Exception as e:
+            print(f"Error getting page count: {e}")
+        return None
+    
+    def get_at_home_server(self, chapter_id, use_cache=True):
+        """Get a chapter's at-home server and page list, reusing a recent lookup; None if unavailable"""
+        if use_cache:
+            with self.at_home_lock:
+                entry = self.at_home_servers.get(chapter_id)
+            if entry and time.monotonic() - entry[1] < AT_HOME_TTL:
+                return entry[0]
+        
+        status_code, server_data = self._get_json(f"{self.base_url}/at-home/server/{chapter_id}")
+        if status_code != 200:
+            return None
+        server = AtHomeServer.from_api(server_data)
+        with self.at_home_lock:
+            self.at_home_servers[chapter_id] = (server, time.monotonic())
+        return server
+    
+    def prefetch_at_home(self, chapter_ids, max_workers=8, should_stop=None, on_found=None):
+        """Look up the at-home servers of many chapters concurrently, in the given order
+        
+        Past the first 40, at_home_limiter paces lookups to 40 a minute, so a long
+        list takes minutes. Later prepare_chapter() calls use the results without a request.
+        on_found(chapter_id, page_count) is called from the pool as each one arrives.
+        Returns a dict of chapter id to page count for the chapters found.
+        """
+        def fetch(chapter_id):
+            if should_stop and should_stop():
+                return chapter_id, None
+            try:
+                server = self.get_at_home_server(chapter_id)
+            except Exception as e:
+                print(f"Error looking up at-home server: {e}")
+                return chapter_id, None
+            if server and on_found:
+                on_found(chapter_id, len(server.data))
+            return chapter_id, server
+        
+        chapter_ids = list(dict.fromkeys(chapter_ids))
+        if not chapter_ids:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chapter_ids))) as executor:
+            return {chapter_id: len(server.data) for chapter_id, server in executor.map(fetch, chapter_ids)
+                    if server}
+    
+    def get_manga_details(self, manga_id, use_cache=True):
         """Get manga details"""
+        if use_cache:
+            with self.manga_cache_lock:
+                if manga_id in self.manga_cache:
+                    return {"result": "ok", "data": self.manga_cache[manga_id]}
+        
         url = f"{self.base_url}/manga/{manga_id}"
         params = {
             "includes[]": ["cover_art", "author", "artist", "tag"]
         }
         
-        response = self._request_with_retry("GET", url, params=params)
-        if response.status_code == 200:
-            return response.json()
+        status_code, details = self._get_json(url, params=params, projection=project_manga)
+        if status_code == 200:
+            self._cache_manga([details.get("data", {})])
+            return details
         else:
             return {"data": {}}
+    
+    def get_manga_details_batch(self, manga_ids, use_cache=True, max_workers=4):
+        """Get details for many manga using /manga?ids[] queries of up to 100 ids each
+        
+        Returns (dict of manga id to manga data, ids whose query failed). Other
+        ids that are missing from the result no longer exist.
+        """
+        manga_ids = list(dict.fromkeys(manga_ids))
+        details = {}
+        
+        if use_cache:
+            with self.manga_cache_lock:
+                for manga_id in manga_ids:
+                    if manga_id in self.manga_cache:
+                        details[manga_id] = self.manga_cache[manga_id]
+        
+        missing = [manga_id for manga_id in manga_ids if manga_id not in details]
+        batches = [missing[i:i + 100] for i in range(0, len(missing), 100)]
+        
+        def fetch_batch(batch):
+            url = f"{self.base_url}/manga"
+            params = {
+                "ids[]": batch,
+                "limit": len(batch),
+                "includes[]": ["cover_art", "author", "artist", "tag"],
+                # Without an explicit filter the endpoint hides some content ratings
+                "contentRating[]": ["safe", "suggestive", "erotica", "pornographic"],
+            }
+            try:
+                status_code, results = self._get_json(url, params=params, projection=project_manga)
+                if status_code == 200:
+                    return batch, results.get("data", [])
+                print(f"Error fetching manga batch: HTTP {status_code}")
+            except Exception as e:
+                print(f"Error fetching manga batch: {e}")
+            return batch, None
+        
+        # At 100 ids per request even a large library is a handful of batches, fetched side by side
+        failed = []
+        if batches:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+                for batch, manga_list in executor.map(fetch_batch, batches):
+                    if manga_list is None:
+                        failed.extend(batch)
+                        continue
+                    self._cache_manga(manga_list)
+                    for manga in manga_list:
+                        details[manga.get("id")] = manga
+        
+        return details, failed
             
     def is_chapter_downloaded(self, chapter_id, manga_title, chapter_num, chapter_title, output_dir, as_pdf=False):
         """Check if a chapter has already been downloaded completely"""
         # Format chapter folder name
-        chapter_folder_name = f"Chapter {chapter_num} - {chapter_title}" if chapter_title else f"Chapter {chapter_num}"
-        chapter_folder_name = self._sanitize_filename(chapter_folder_name)
+        chapter = Chapter(chapter_id, number=chapter_num, title=chapter_title)
+        chapter_folder_name = self._sanitize_filename(chapter.folder_name)
         
         # Get manga directory path
         manga_dir = os.path.normpath(os.path.join(output_dir, self._sanitize_filename(manga_title)))
@@ -148,47 +534,70 @@ class MangadexAPI(QObject):
             if not os.path.exists(chapter_dir):
                 return False
             
-            # Get expected image count from API
-            try:
-                url = f"{self.base_url}/at-home/server/{chapter_id}"
-                response = self._request_with_retry("GET", url)
-                
-                if response.status_code != 200:
-                    # If API fails, just check if directory has any files
-                    files = os.listdir(chapter_dir)
-                    return len(files) > 0
-                
-                chapter_data = response.json()
-                expected_images = chapter_data["chapter"]["data"]
-                total_expected = len(expected_images)
-                
-                # Check if all expected images are downloaded
-                existing_files = os.listdir(chapter_dir)
-                return len(existing_files) >= total_expected
-                
-            except Exception as e:
-                print(f"Error checking chapter completeness: {e}")
-                # If there's an error, just check if directory has any files
-                files = os.listdir(chapter_dir)
-                return len(files) > 0
+            existing_files = self._list_pages(chapter_dir)
+            
+            # Get expected image count from API; if that fails, just check if directory has any files
+            total_expected = self._get_expected_page_count(chapter_id)
+            if total_expected is None:
+                return len(existing_files) > 0
+            
+            # Check if all expected images are downloaded
+            return len(existing_files) >= total_expected
+    
+    def has_output(self, manga_title, output_dir, chapter, as_pdf=False):
+        """Whether a chapter's PDF, or its folder with all of its pages, is already on disk
+        
+        Only the disk is checked, using the page count of the Chapter record, so
+        finished chapters can be left out before any at-home lookup.
+        """
+        manga_dir = os.path.normpath(os.path.join(output_dir, self._sanitize_filename(manga_title)))
+        chapter_folder_name = self._sanitize_filename(chapter.folder_name)
+        if as_pdf and os.path.exists(os.path.join(manga_dir, f"{chapter_folder_name}.pdf")):
+            return True
+        
+        chapter_dir = os.path.join(manga_dir, chapter_folder_name)
+        if not chapter.pages or not os.path.isdir(chapter_dir):
+            return False
+        return len(self._list_pages(chapter_dir)) >= chapter.pages
+    
+    def download_chapter(self, chapter_id, manga_title, output_dir, chapter=None, as_pdf=False, control=None):
+        """Download a chapter
+        
+        chapter can be a Chapter record or a raw API chapter object; it is fetched when omitted.
+        control is an optional DownloadControl; cancelling it raises DownloadCancelled
+        and leaves finished pages and .part files for a later resume.
+        """
+        job = self.prepare_chapter(chapter_id, manga_title, output_dir, chapter, as_pdf, control)
+        if not job:
+            return False
+        
+        try:
+            for page_index in job.pending_pages():
+                if not self.fetch_page(job, page_index) and job.aborted:
+                    break
+        finally:
+            self.collect_processed_pages(job)
+        return self.finalize_chapter(job)
     
-    def download_chapter(self, chapter_id, manga_title, output_dir, chapter_data=None, as_pdf=False):
-        """Download a chapter"""
+    def prepare_chapter(self, chapter_id, manga_title, output_dir, chapter=None, as_pdf=False, control=None):
+        """Look up a chapter's pages and on-disk state, returning a ChapterJob or False on failure
+        
+        The job's pages can then be fetched in any order, from any thread, with
+        fetch_page(); finalize_chapter() produces the chapter's folder or PDF.
+        """
         # Get chapter data if not provided
-        if not chapter_data:
+        if chapter is None:
             url = f"{self.base_url}/chapter/{chapter_id}"
-            response = self._request_with_retry("GET", url)
-            if response.status_code == 200:
-                chapter_data = response.json()["data"]
+            status_code, chapter_response = self._get_json(url, projection=project_chapter)
+            if status_code == 200:
+                chapter = chapter_response["data"]
             else:
                 return False
+        if not isinstance(chapter, Chapter):
+            chapter = Chapter.from_api(chapter)
         
         # Get chapter info
-        chapter_attrs = chapter_data.get("attributes", {})
-        chapter_num = chapter_attrs.get("chapter", "Unknown")
-        chapter_title = chapter_attrs.get("title", f"Chapter {chapter_num}")
-        chapter_folder_name = f"Chapter {chapter_num} - {chapter_title}" if chapter_title else f"Chapter {chapter_num}"
-        chapter_folder_name = self._sanitize_filename(chapter_folder_name)
+        chapter_folder_name = self._sanitize_filename(chapter.folder_name)
         
         # Create manga directory - normalize path to use consistent slashes
         manga_dir = os.path.normpath(os.path.join(output_dir, self._sanitize_filename(manga_title)))
@@ -197,64 +606,34 @@ class MangadexAPI(QObject):
         # Create chapter directory - normalize path to use consistent slashes
         chapter_dir = os.path.normpath(os.path.join(manga_dir, chapter_folder_name))
         
+        job = ChapterJob(chapter, manga_title, manga_dir, chapter_dir, chapter_folder_name, as_pdf, control)
+        
         # Check if chapter already exists as PDF
         if as_pdf:
             pdf_path = os.path.normpath(os.path.join(manga_dir, f"{chapter_folder_name}.pdf"))
             if os.path.exists(pdf_path):
                 print(f"Chapter already downloaded as PDF: {chapter_folder_name}")
-                return pdf_path
-        
-        # Get chapter images from API first to check completeness
-        url = f"{self.base_url}/at-home/server/{chapter_id}"
-        response = self._request_with_retry("GET", url)
+                job.result = pdf_path
+                return job
         
-        if response.status_code != 200:
+        # Get chapter images from API first to check completeness, usually prefetched
+        job.server = self.get_at_home_server(chapter.id)
+        if job.server is None:
             return False
         
-        chapter_data = response.json()
-        base_url = chapter_data["baseUrl"]
-        chapter_hash = chapter_data["chapter"]["hash"]
-        expected_images = chapter_data["chapter"]["data"]
-        total_expected = len(expected_images)
-        
         # Check if chapter directory exists with images
-        if os.path.exists(chapter_dir) and os.listdir(chapter_dir):
-            # Check if all expected images are downloaded
-            existing_files = os.listdir(chapter_dir)
-            
+        existing_files = self._list_pages(chapter_dir) if os.path.exists(chapter_dir) else []
+        if existing_files:
             # If all images are downloaded
-            if len(existing_files) >= total_expected:
+            if len(existing_files) >= len(job.server.data):
                 print(f"Chapter already downloaded: {chapter_folder_name}")
                 
                 # If PDF conversion is requested but we have images, convert them
-                if as_pdf:
-                    try:
-                        from PIL import Image
-                        pdf_path = os.path.normpath(os.path.join(manga_dir, f"{chapter_folder_name}.pdf"))
-                        
-                        # Get all image files in the directory
-                        image_files = [os.path.join(chapter_dir, f) for f in os.listdir(chapter_dir) 
-                                      if f.lower().endswith(('.png', '.jpg', '.jpeg', '.webp'))]
-                        image_files.sort()  # Sort to ensure correct order
-                        
-                        if image_files:
-                            images = [Image.open(img_path) for img_path in image_files]
-                            images[0].save(
-                                pdf_path, "PDF", resolution=100.0, 
-                                save_all=True, append_images=images[1:]
-                            )
-                            
-                            # Remove the image files after PDF creation
-                            for img_path in image_files:
-                                os.remove(img_path)
-                            os.rmdir(chapter_dir)
-                            
-                            return pdf_path
-                    except Exception as e:
-                        print(f"Error creating PDF from existing images: {e}")
-                        return chapter_dir
-                
-                return chapter_dir
+                job.pages = [os.path.join(chapter_dir, f) for f in sorted(existing_files, key=page_order_key)
+                             if f.lower().endswith(IMAGE_EXTENSIONS)]
+                job.completed = len(job.pages)
+                self.progress.add_chapter(chapter.id, f"Chapter {chapter.number}", job.completed, job.completed)
+                return job
             else:
                 print(f"Chapter {chapter_folder_name} is incomplete. Resuming download...")
                 # Continue with download to get missing images
@@ -262,70 +641,222 @@ class MangadexAPI(QObject):
         # Create chapter directory if it doesn't exist
         os.makedirs(chapter_dir, exist_ok=True)
         
-        # We already have chapter data from the earlier check
-        if not 'base_url' in locals() or not 'expected_images' in locals():
-            # Get chapter images
-            url = f"{self.base_url}/at-home/server/{chapter_id}"
-            response = self._request_with_retry("GET", url)
-            
-            if response.status_code != 200:
-                return False
-            
-            chapter_data = response.json()
-            base_url = chapter_data["baseUrl"]
-            chapter_hash = chapter_data["chapter"]["hash"]
-            expected_images = chapter_data["chapter"]["data"]
+        job.pages = [None] * len(job.server.data)
+        job.page_store = self._get_page_store(output_dir)
+        
+        # Pages are post-processed in worker processes while the next ones download
+        job.manifest = self._get_manifest(manga_dir)
+        
+        self.progress.add_chapter(chapter.id, f"Chapter {chapter.number}", len(job.pages))
+        return job
+    
+    def fetch_page(self, job, page_index):
+        """Get one page of a prepared chapter onto disk; returns True once it is there
+        
+        Thread-safe: different pages of a job can be fetched concurrently.
+        """
+        if job.control:
+            job.control.check()
+        if job.aborted:
+            return False
         
-        # Use the data we already have
-        data = expected_images
+        image = job.server.data[page_index]
+        image_path = os.path.normpath(os.path.join(job.chapter_dir, image))
         
-        # Download images
-        total_images = len(data)
-        downloaded_images = []
+        # Skip pages that were already processed in an earlier run
+        if job.manifest:
+            entry = job.manifest.get(job.folder_name, image)
+            processed_path = os.path.join(job.chapter_dir, entry["file"]) if entry else None
+            if processed_path and os.path.exists(processed_path):
+                job.page_done(page_index, processed_path)
+                self.progress.page_done(fetched=False)
+                return True
+        
+        # Skip if image already exists
+        fetched = False
+        if not (os.path.exists(image_path) and os.path.getsize(image_path) > 0):
+            # Pages already in the store, such as group credit pages, skip the network
+            if not (job.page_store and job.page_store.link(image, image_path)):
+                if not self._download_job_page(job, image, image_path):
+                    return False
+                fetched = True
+                # A page that is about to be re-encoded is not stored; the store would keep
+                # the full-size original long after the chapter folder switched to the smaller file
+                if job.page_store and not job.manifest:
+                    with profiler.stage("page_store"):
+                        job.page_store.add_file(image_path, image)
+        
+        if job.manifest:
+            job.add_processing(page_index, image, self.postprocessor.submit(image_path))
+        job.page_done(page_index, image_path)
+        self.progress.page_done(fetched)
+        return True
+    
+    def collect_processed_pages(self, job):
+        """Wait for a job's post-processed pages; a page that failed keeps its original file"""
+        if not job.manifest or not job.processing:
+            return
+        
+        for page_index, image, future in job.processing:
+            try:
+                with profiler.stage("postprocess_wait"):
+                    entry = future.result()
+            except Exception as e:
+                print(f"Error post-processing {image}: {e}")
+                continue
+            job.manifest.record(job.folder_name, image, entry)
+            job.pages[page_index] = os.path.join(job.chapter_dir, entry["file"])
+        job.processing = []
+        job.manifest.save()
+    
+    def finalize_chapter(self, job):
+        """Finish a chapter whose pages were fetched, returning its folder or PDF path
+        
+        Returns None if a page is missing; the finished pages are kept for a resume.
+        """
+        self.progress.finish_chapter(job.chapter.id)
+        if job.result:
+            return job.result
+        
+        self.collect_processed_pages(job)
+        
+        if not all(job.pages):
+            print(f"{job.folder_name}: {job.completed} of {len(job.pages)} pages downloaded, "
+                  f"leaving the rest for a later resume")
+            return None
+        
+        # Convert to PDF if requested
+        if job.as_pdf and job.pages:
+            return self._convert_to_pdf(job.pages, job.manga_dir, job.chapter_dir, job.folder_name, job.control)
+        
+        return job.chapter_dir
+    
+    def _download_job_page(self, job, image, image_path, max_attempts=3):
+        """Download a page of a job, switching to another at-home server if the current one is down
         
-        for i, image in enumerate(data):
-            image_url = f"{base_url}/data/{chapter_hash}/{image}"
-            image_path = os.path.normpath(os.path.join(chapter_dir, image))
+        A page turned away while another page probes a recovering server waits
+        for the probe's result and is tried again instead of being dropped.
+        """
+        for _ in range(max_attempts):
+            url = job.server.page_url(image)
+            rejected = False
+            try:
+                # Pages are streamed to a .part file that only gets its real name once complete
+                if self._download_page(url, image_path, job.control):
+                    return True
+            except CircuitOpenError:
+                rejected = True
             
-            # Skip if image already exists
-            if os.path.exists(image_path) and os.path.getsize(image_path) > 0:
-                downloaded_images.append(image_path)
-                self.download_progress.emit(i + 1, total_images, manga_title, f"Chapter {chapter_num}")
+            breaker = self.client.get_circuit_breaker(url)
+            if breaker.state == "closed":
+                if rejected:
+                    continue  # A probe closed the circuit in the meantime
+                return False
+            if breaker.state == "half_open":
+                if not self.wait_for_host(url, should_stop=lambda: job.control and job.control.cancelled):
+                    job.control.check()
                 continue
-                
-            downloaded_images.append(image_path)
             
-            response = self._request_with_retry("GET", image_url)
-            if response.status_code == 200:
-                with open(image_path, "wb") as f:
-                    f.write(response.content)
-                self.download_progress.emit(i + 1, total_images, manga_title, f"Chapter {chapter_num}")
+            # The at-home node is down; ask for another one instead of failing every remaining page
+            if self._replace_server(job) is None:
+                print(f"No available server for {job.folder_name}, leaving the rest for a later resume")
+                job.aborted = True
+                return False
+        return False
+    
+    def _replace_server(self, job):
+        """Ask for another at-home server for a job whose server went down, or None if there is none"""
+        with job.server_lock:
+            if self.is_host_available(job.server.base_url):
+                return job.server  # Another page already switched servers
             
-        # Convert to PDF if requested
-        if as_pdf and downloaded_images:
-            try:
-                from PIL import Image
-                pdf_path = os.path.normpath(os.path.join(manga_dir, f"{chapter_folder_name}.pdf"))
-                
-                images = [Image.open(img_path) for img_path in downloaded_images]
-                if images:
-                    images[0].save(
-                        pdf_path, "PDF", resolution=100.0, 
-                        save_all=True, append_images=images[1:]
-                    )
-                    
-                    # Remove the image files after PDF creation
-                    for img_path in downloaded_images:
-                        os.remove(img_path)
-                    os.rmdir(chapter_dir)
-                    
-                    return pdf_path
-            except Exception as e:
-                print(f"Error creating PDF: {e}")
+            server = self.get_at_home_server(job.chapter.id, use_cache=False)
+            if server and self.is_host_available(server.base_url):
+                job.server = server
+                return job.server
+            return None
+    
+    def _convert_to_pdf(self, image_paths, manga_dir, chapter_dir, chapter_folder_name, control=None):
+        """Combine a chapter's pages into a PDF and remove them, returning the PDF path
+        
+        The PDF is written under a temporary name, so a cancelled or failed
+        conversion leaves the pages in place instead of a broken PDF.
+        """
+        pdf_path = os.path.normpath(os.path.join(manga_dir, f"{chapter_folder_name}.pdf"))
+        temp_path = f"{pdf_path}.part"
+        images = []
+        try:
+            from PIL import Image
+            for img_path in image_paths:
+                if control:
+                    control.check()
+                images.append(Image.open(img_path))
+            if not images:
                 return chapter_dir
+            
+            with profiler.stage("pdf_build"):
+                images[0].save(
+                    temp_path, "PDF", resolution=100.0, 
+                    save_all=True, append_images=images[1:]
+                )
+            os.replace(temp_path, pdf_path)
+        except DownloadCancelled:
+            raise
+        except Exception as e:
+            print(f"Error creating PDF: {e}")
+            return chapter_dir
+        finally:
+            for image in images:
+                image.close()
         
-        return chapter_dir
+        # Remove the image files after PDF creation
+        for img_path in image_paths:
+            os.remove(img_path)
+        shutil.rmtree(chapter_dir, ignore_errors=True)
+        return pdf_path
+    
+    def add_to_volume(self, manga_title, output_dir, chapter, chapter_path):
+        """Add a downloaded chapter to its volume's CBZ or PDF, returning the archive path or None"""
+        manga_dir = os.path.normpath(os.path.join(output_dir, self._sanitize_filename(manga_title)))
+        try:
+            with profiler.stage("volume_merge"):
+                return self.volume_archiver.add_chapter(manga_dir, chapter, chapter_path)
+        except Exception as e:
+            print(f"Error adding chapter to volume: {e}")
+            return None
+    
+    def _get_page_store(self, output_dir):
+        """Get the page store of a download directory, or None if deduplication is disabled"""
+        if not self.dedup_store:
+            return None
         
+        root = os.path.normpath(os.path.join(output_dir, ".store"))
+        with self.page_stores_lock:
+            if root not in self.page_stores:
+                self.page_stores[root] = PageStore(root)
+            return self.page_stores[root]
+    
+    def _get_manifest(self, manga_dir):
+        """Get the post-processing manifest of a manga folder, or None if post-processing is disabled"""
+        if not self.postprocessor:
+            return None
+        
+        with self.manifests_lock:
+            if manga_dir not in self.manifests:
+                self.manifests[manga_dir] = Manifest(manga_dir)
+            return self.manifests[manga_dir]
+    
+    def _cache_manga(self, manga_list):
+        """Store manga data in the metadata cache"""
+        with self.manga_cache_lock:
+            for manga in manga_list:
+                if manga.get("id"):
+                    self.manga_cache[manga["id"]] = manga
+        try:
+            self.metadata_index.add_many(manga_list)
+        except sqlite3.Error as e:
+            print(f"Error updating local index: {e}")
+    
     def _sanitize_filename(self, filename):
         """Remove invalid characters from filename"""
         invalid_chars = ['<', '>', ':', '"', '/', '\\', '|', '?', '*']
@@ -341,28 +872,111 @@ class MangadexAPI(QObject):
             
         return filename
         
-    def _create_session(self):
-        """Create a requests session with retry functionality"""
-        session = requests.Session()
-        retry_strategy = Retry(
-            total=5,  # Total number of retries
-            backoff_factor=1,  # Time between retries: {backoff factor} * (2 ** ({number of total retries} - 1))
-            status_forcelist=[429, 500, 502, 503, 504],  # HTTP status codes to retry on
-            allowed_methods=["GET", "POST"]  # HTTP methods to retry on
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-        return session
+    def _get_rate_limiter(self, url):
+        """Get the rate limiter for a URL, or None for hosts without a limit"""
+        if url.startswith(f"{self.base_url}/at-home/"):
+            return self.at_home_limiter
+        elif url.startswith(self.base_url):
+            return self.api_limiter
+        return None
+        
+    def _get_json(self, url, params=None, projection=None):
+        """GET a JSON resource, returning (status_code, parsed data or None)
+        
+        Concurrent calls for the same URL and params share one request. The
+        parsed data is shared too, so callers must not modify it. In lean mode
+        projection is applied to the record(s) under "data".
+        """
+        def fetch():
+            try:
+                with profiler.stage("api_request"):
+                    response = self._request_with_retry("GET", url, params=params)
+            except requests.RequestException as e:
+                print(f"Request failed: {e}")
+                return None, None
+            if response.status_code != 200:
+                return response.status_code, None
+            
+            with profiler.stage("json_parse"):
+                data = json_loads(response.content)
+                if self.lean and projection and isinstance(data, dict):
+                    if isinstance(data.get("data"), list):
+                        data["data"] = [projection(item) for item in data["data"]]
+                    elif isinstance(data.get("data"), dict):
+                        data["data"] = projection(data["data"])
+            return response.status_code, data
+        
+        return self.single_flight.do(self.http_cache.make_key(url, params), fetch)
+    
+    def _get_cache_ttl(self, url):
+        """Get how long a response may be served from the cache, or None if it must not be cached"""
+        path = url[len(self.base_url):]
+        if not url.startswith(self.base_url) or path.startswith("/at-home/"):
+            return None  # At-home server URLs are short-lived and node specific
+        elif path.endswith("/feed") or path.startswith("/chapter"):
+            return 5 * 60
+        elif path.startswith("/manga/"):
+            return 60 * 60
+        return 10 * 60
         
     def _request_with_retry(self, method, url, **kwargs):
-        """Make a request with retry functionality"""
+        """Make a request with retry functionality, serving API GETs from the cache when possible"""
+        cache_ttl = self._get_cache_ttl(url) if method == "GET" else None
+        if cache_ttl is None:
+            return self._send_request(method, url, **kwargs)
+        
+        cache_key = self.http_cache.make_key(url, kwargs.get("params"))
+        entry = self.http_cache.get(cache_key)
+        if entry and self.http_cache.is_fresh(entry):
+            return self.http_cache.to_response(entry)
+        
+        # Ask the server whether the stale entry is still valid
+        if entry and self.http_cache.can_revalidate(entry):
+            kwargs["headers"] = {**kwargs.get("headers", {}), **self.http_cache.conditional_headers(entry)}
+        
+        response = self._send_request(method, url, **kwargs)
+        if response.status_code == 304 and entry:
+            self.http_cache.refresh(cache_key, entry, response, cache_ttl)
+            return self.http_cache.to_response(entry)
+        elif response.status_code == 200:
+            self.http_cache.put(cache_key, response, cache_ttl)
+        return response
+    
+    def is_host_available(self, url):
+        """Whether a request to the URL's host would be let through now"""
+        return self.client.get_circuit_breaker(url).is_available()
+    
+    def wait_for_host(self, url, should_stop=None):
+        """Block until the URL's host may be probed again, or a probe in flight has finished
+        
+        Returns False if should_stop() said to give up.
+        """
+        breaker = self.client.get_circuit_breaker(url)
+        while True:
+            if should_stop and should_stop():
+                return False
+            if breaker.state == "half_open":
+                breaker.wait_for_probe(timeout=1)
+            elif breaker.seconds_until_retry() > 0:
+                time.sleep(min(breaker.seconds_until_retry(), 1))
+            else:
+                return True
+    
+    def _download_page(self, url, path, control=None):
+        """Download a page image to path, hedging requests that are unusually slow for the host"""
         try:
-            response = self.session.request(method, url, **kwargs)
-            return response
-        except (requests.ConnectionError, requests.Timeout) as e:
-            print(f"Connection error: {e}. Retrying...")
-            # If all retries failed, try one more time with a longer timeout
-            time.sleep(2)
-            kwargs['timeout'] = 30  # Longer timeout for the final attempt
-            return self.session.request(method, url, **kwargs)
\ No newline at end of file
+            with profiler.stage("page_fetch"):
+                return self.client.download(url, path, control=control, on_bytes=self.progress.add_bytes)
+        except CircuitOpenError:
+            raise  # Handled by the caller, which can wait for the host or switch servers
+        except OSError as e:
+            print(f"Error saving {path}: {e}")
+            return False
+    
+    def _list_pages(self, chapter_dir):
+        """Finished page files of a chapter folder, ignoring partial downloads"""
+        return [name for name in os.listdir(chapter_dir) if not name.endswith(PARTIAL_SUFFIXES)]
+    
+    def _send_request(self, method, url, **kwargs):
+        """Send a request through the shared client under the URL's rate limit"""
+        return self.client.request(method, url, rate_limiter=self._get_rate_limiter(url), **kwargs)
@@ -0,0 +1,102 @@
+import os
+import re
+import json
+import sqlite3
+import threading
+from models import Manga
+
+
+class MetadataIndex:
+    """Local SQLite FTS5 index of the manga metadata seen in API responses
+    
+    Every manga record from searches and detail lookups is stored, so titles,
+    alternative titles, authors and tags can be searched in milliseconds and
+    without a connection. Matches are returned as the stored API records.
+    On a SQLite build without FTS5, a plain table is searched with LIKE instead.
+    """
+    
+    def __init__(self, path=None):
+        self.path = path or os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "metadata.db")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS manga ("
+                              "rowid INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, cover_file TEXT, record TEXT)")
+            # Rows of the full-text table share their rowid with the manga table
+            try:
+                self.conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS manga_fts USING fts5("
+                                  "title, alt_titles, authors, tags, tokenize='unicode61 remove_diacritics 2')")
+                self.fts = True
+            except sqlite3.OperationalError as e:
+                print(f"Full-text search unavailable ({e}), local search will be slower")
+                self.fts = False
+                self.conn.execute("CREATE TABLE IF NOT EXISTS manga_text (rowid INTEGER PRIMARY KEY, text TEXT)")
+    
+    def add_many(self, manga_list):
+        """Add or update API manga objects"""
+        rows = []
+        for data in manga_list:
+            if not data.get("id"):
+                continue
+            manga = Manga.from_api(data)
+            rows.append((manga, json.dumps(data)))
+        if not rows:
+            return
+        
+        with self.lock, self.conn:
+            for manga, record in rows:
+                existing = self.conn.execute("SELECT rowid FROM manga WHERE id = ?", (manga.id,)).fetchone()
+                if existing:
+                    if self.fts:
+                        self.conn.execute("DELETE FROM manga_fts WHERE rowid = ?", existing)
+                    self.conn.execute("UPDATE manga SET cover_file = ?, record = ? WHERE rowid = ?",
+                                      (manga.cover_file, record, existing[0]))
+                    rowid = existing[0]
+                else:
+                    rowid = self.conn.execute("INSERT INTO manga (id, cover_file, record) VALUES (?, ?, ?)",
+                                              (manga.id, manga.cover_file, record)).lastrowid
+                fields = (manga.title or "", "\n".join(manga.alt_titles), "\n".join(manga.authors),
+                          "\n".join(manga.tags))
+                if self.fts:
+                    self.conn.execute("INSERT INTO manga_fts (rowid, title, alt_titles, authors, tags) "
+                                      "VALUES (?, ?, ?, ?, ?)", (rowid, *fields))
+                else:
+                    self.conn.execute("INSERT OR REPLACE INTO manga_text (rowid, text) VALUES (?, ?)",
+                                      (rowid, "\n".join(fields).casefold()))
+    
+    def search(self, query, limit=20):
+        """API manga objects matching every word of query as a prefix, best matches first"""
+        words = re.findall(r"\w+", query)
+        if not words:
+            return []
+        if not self.fts:
+            return self._search_like(words, limit)
+        # Quoted prefix terms, so user input cannot be read as FTS syntax
+        match = " ".join(f'"{word}"*' for word in words)
+        
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT manga.record FROM manga_fts JOIN manga ON manga.rowid = manga_fts.rowid "
+                "WHERE manga_fts MATCH ? ORDER BY bm25(manga_fts, 10.0, 5.0, 2.0, 1.0) LIMIT ?",
+                (match, limit)
+            ).fetchall()
+        return [json.loads(record) for record, in rows]
+    
+    def _search_like(self, words, limit):
+        """Manga containing every word, most recently added first; a full scan, without ranking"""
+        conditions = " AND ".join("manga_text.text LIKE ? ESCAPE '\\'" for _ in words)
+        # "_" is a LIKE wildcard but also a word character
+        patterns = ["%" + word.casefold().replace("_", r"\_") + "%" for word in words]
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT manga.record FROM manga_text JOIN manga ON manga.rowid = manga_text.rowid "
+                f"WHERE {conditions} ORDER BY manga.rowid DESC LIMIT ?",
+                patterns + [limit]
+            ).fetchall()
+        return [json.loads(record) for record, in rows]
+    
+    def close(self):
+        with self.lock:
+            self.conn.close()
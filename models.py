@@ -0,0 +1,169 @@
+class Manga:
+    """Manga record parsed once from an API manga object"""
+    __slots__ = ("id", "title", "alt_titles", "description", "tags", "authors", "cover_file",
+                 "status", "year", "content_rating")
+    
+    def __init__(self, id, title=None, alt_titles=(), description=None, tags=(), authors=(),
+                 cover_file=None, status=None, year=None, content_rating=None):
+        self.id = id
+        self.title = title
+        self.alt_titles = tuple(alt_titles)
+        self.description = description
+        self.tags = tuple(tags)
+        self.authors = tuple(authors)
+        self.cover_file = cover_file
+        self.status = status
+        self.year = year
+        self.content_rating = content_rating
+    
+    @classmethod
+    def from_api(cls, data):
+        attrs = data.get("attributes", {})
+        
+        alt_titles = []
+        for alt_title in attrs.get("altTitles", []):
+            alt_titles.extend(alt_title.values())
+        
+        tags = []
+        for tag in attrs.get("tags", []):
+            tag_name = tag.get("attributes", {}).get("name", {}).get("en")
+            if tag_name:
+                tags.append(tag_name)
+        
+        authors = []
+        cover_file = None
+        for relationship in data.get("relationships", []):
+            rel_attrs = relationship.get("attributes") or {}
+            if relationship.get("type") == "cover_art" and cover_file is None:
+                cover_file = rel_attrs.get("fileName")
+            elif relationship.get("type") in ("author", "artist") and rel_attrs.get("name"):
+                if rel_attrs["name"] not in authors:
+                    authors.append(rel_attrs["name"])
+        
+        return cls(
+            data.get("id"),
+            title=attrs.get("title", {}).get("en"),
+            alt_titles=alt_titles,
+            description=(attrs.get("description") or {}).get("en"),
+            tags=tags,
+            authors=authors,
+            cover_file=cover_file,
+            status=attrs.get("status"),
+            year=attrs.get("year"),
+            content_rating=attrs.get("contentRating"),
+        )
+    
+    @property
+    def cover_url(self):
+        if not self.cover_file:
+            return None
+        return f"https://uploads.mangadex.org/covers/{self.id}/{self.cover_file}"
+
+
+class Chapter:
+    """Chapter record parsed once from an API chapter object"""
+    __slots__ = ("id", "manga_id", "number", "title", "volume", "language", "pages",
+                 "group_ids", "group_names", "published_at", "updated_at", "external_url")
+    
+    def __init__(self, id, manga_id=None, number="Unknown", title=None, volume=None, language=None,
+                 pages=0, group_ids=(), group_names=(), published_at=None, updated_at=None,
+                 external_url=None):
+        self.id = id
+        self.manga_id = manga_id
+        self.number = number
+        self.title = title
+        self.volume = volume
+        self.language = language
+        self.pages = pages
+        self.group_ids = tuple(group_ids)
+        self.group_names = tuple(group_names)
+        self.published_at = published_at
+        self.updated_at = updated_at
+        self.external_url = external_url
+    
+    @classmethod
+    def from_api(cls, data):
+        attrs = data.get("attributes", {})
+        
+        manga_id = None
+        group_ids = []
+        group_names = []
+        for relationship in data.get("relationships", []):
+            if relationship.get("type") == "manga":
+                manga_id = relationship.get("id")
+            elif relationship.get("type") == "scanlation_group":
+                group_ids.append(relationship.get("id"))
+                group_names.append((relationship.get("attributes") or {}).get("name"))
+        
+        return cls(
+            data.get("id"),
+            manga_id=manga_id,
+            number=attrs.get("chapter", "Unknown"),
+            title=attrs.get("title"),
+            volume=attrs.get("volume"),
+            language=attrs.get("translatedLanguage"),
+            pages=attrs.get("pages") or 0,
+            group_ids=group_ids,
+            group_names=group_names,
+            published_at=attrs.get("publishAt"),
+            updated_at=attrs.get("updatedAt"),
+            external_url=attrs.get("externalUrl"),
+        )
+    
+    @property
+    def display_title(self):
+        return self.title if self.title is not None else f"Chapter {self.number}"
+    
+    @property
+    def folder_name(self):
+        """Chapter folder/PDF name before sanitizing"""
+        return f"Chapter {self.number} - {self.title}" if self.title else f"Chapter {self.number}"
+    
+    def sort_key(self):
+        try:
+            return (0, float(self.number))
+        except (TypeError, ValueError):
+            return (1, 0.0)
+
+
+class AtHomeServer:
+    """Image server assignment and page file names for one chapter"""
+    __slots__ = ("base_url", "hash", "data", "data_saver")
+    
+    def __init__(self, base_url, hash, data=(), data_saver=()):
+        self.base_url = base_url
+        self.hash = hash
+        self.data = tuple(data)
+        self.data_saver = tuple(data_saver)
+    
+    @classmethod
+    def from_api(cls, data):
+        chapter = data.get("chapter", {})
+        return cls(data["baseUrl"], chapter["hash"], chapter.get("data", ()), chapter.get("dataSaver", ()))
+    
+    def page_url(self, filename):
+        return f"{self.base_url}/data/{self.hash}/{filename}"
+
+
+class DownloadIndex:
+    """Downloaded and incomplete chapters of one manga, indexed by chapter number"""
+    __slots__ = ("downloaded", "incomplete", "paths")
+    
+    def __init__(self):
+        self.downloaded = set()
+        self.incomplete = set()
+        self.paths = {}
+    
+    def add(self, chapter_num, path, complete=True):
+        if complete:
+            self.downloaded.add(chapter_num)
+            self.incomplete.discard(chapter_num)
+        elif chapter_num not in self.downloaded:
+            self.incomplete.add(chapter_num)
+        self.paths[chapter_num] = path
+    
+    def is_downloaded(self, chapter_num):
+        return chapter_num in self.downloaded
+    
+    def is_incomplete(self, chapter_num):
+        return chapter_num in self.incomplete
@@ -0,0 +1,108 @@
+import os
+import errno
+import re
+import shutil
+import hashlib
+import threading
+
+# at-home page file names look like "x12-<sha256 of the image>.png"
+PAGE_HASH_RE = re.compile(r"([0-9a-f]{64})", re.IGNORECASE)
+
+# os.link errors meaning hardlinks cannot be used here at all, rather than a problem with one file
+NO_LINK_ERRORS = {errno.EXDEV, errno.EPERM, errno.ENOTSUP, errno.EOPNOTSUPP, errno.EMLINK}
+
+
+class PageStore:
+    """Content-addressed store of page images shared by every chapter folder
+    
+    Pages are stored once under <download dir>/.store by SHA-256 and hardlinked
+    into chapter folders, falling back to a copy where hardlinks are not supported.
+    """
+    
+    def __init__(self, root):
+        self.root = root
+        self.lock = threading.Lock()
+        self.can_link = True
+    
+    def hash_from_filename(self, filename):
+        """Get the SHA-256 the at-home file name carries, or None"""
+        match = PAGE_HASH_RE.search(filename)
+        return match.group(1).lower() if match else None
+    
+    def path_for(self, digest, filename):
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(self.root, digest[:2], f"{digest}{extension}")
+    
+    def link(self, filename, dest_path):
+        """Put a stored page at dest_path without downloading it; returns False if it is not stored"""
+        digest = self.hash_from_filename(filename)
+        if not digest:
+            return False
+        
+        store_path = self.path_for(digest, filename)
+        if not os.path.exists(store_path):
+            return False
+        return self._place(store_path, dest_path)
+    
+    def add_file(self, path, filename):
+        """Store a downloaded page file, replacing it with a link to the stored copy"""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        digest = digest.hexdigest()
+        store_path = self.path_for(digest, filename)
+        
+        if os.path.exists(store_path):
+            # Identical page already stored, keep a single copy
+            self._place(store_path, path)
+            return digest
+        
+        os.makedirs(os.path.dirname(store_path), exist_ok=True)
+        temp_path = self._temp_path(store_path)
+        try:
+            self._link_or_copy(path, temp_path)
+            os.replace(temp_path, store_path)
+        except OSError as e:
+            print(f"Error adding page to store: {e}")
+            self._remove(temp_path)
+        return digest
+    
+    def _place(self, store_path, dest_path):
+        """Link (or copy) a stored page to dest_path, replacing whatever is there"""
+        temp_path = self._temp_path(dest_path)
+        try:
+            self._link_or_copy(store_path, temp_path)
+            os.replace(temp_path, dest_path)
+            return True
+        except OSError as e:
+            print(f"Error placing page from store: {e}")
+            self._remove(temp_path)
+            return False
+    
+    def _link_or_copy(self, source, temp_path):
+        """Hardlink source to temp_path, copying it where hardlinks cannot be used"""
+        # A temporary file of the same name can only be left over from a crash
+        self._remove(temp_path)
+        if self.can_link:
+            try:
+                os.link(source, temp_path)
+                return
+            except OSError as e:
+                if e.errno in NO_LINK_ERRORS:
+                    # Different volume or a file system without hardlinks, copy from now on
+                    with self.lock:
+                        self.can_link = False
+        shutil.copyfile(source, temp_path)
+    
+    def _temp_path(self, path):
+        """Temporary name next to path, unique across threads and the bulk worker processes"""
+        return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error removing {path}: {e}")
@@ -0,0 +1,109 @@
+import os
+import json
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# PIL format names and file extensions of the supported output formats
+IMAGE_FORMATS = {
+    "webp": ("WEBP", ".webp"),
+    "avif": ("AVIF", ".avif"),
+    "jpeg": ("JPEG", ".jpg"),
+}
+
+
+def process_page(path, max_width, image_format, quality):
+    """Resize and re-encode one page in a worker process, dropping its metadata"""
+    from PIL import Image
+    
+    pil_format, extension = IMAGE_FORMATS[image_format]
+    bytes_in = os.path.getsize(path)
+    
+    with Image.open(path) as img:
+        img.load()
+        width, height = img.size
+        if max_width and width > max_width:
+            img = img.resize((max_width, max(round(height * max_width / width), 1)), Image.LANCZOS)
+        
+        # JPEG has no alpha channel; palette and 16-bit images are converted for every format
+        if image_format == "jpeg" and img.mode != "L":
+            img = img.convert("RGB")
+        elif img.mode not in ("RGB", "RGBA", "L"):
+            img = img.convert("RGBA" if "A" in img.mode or "transparency" in img.info else "RGB")
+        
+        # Saving without exif/icc_profile arguments leaves the metadata behind
+        out_path = os.path.splitext(path)[0] + extension
+        temp_path = f"{out_path}.tmp"
+        img.save(temp_path, pil_format, quality=quality)
+        size = img.size
+    
+    os.replace(temp_path, out_path)
+    if out_path != path:
+        os.remove(path)
+    
+    return {
+        "file": os.path.basename(out_path),
+        "width": size[0],
+        "height": size[1],
+        "format": image_format,
+        "bytes_in": bytes_in,
+        "bytes_out": os.path.getsize(out_path),
+    }
+
+
+class PostProcessor:
+    """Runs page post-processing on all CPU cores while downloads continue"""
+    
+    def __init__(self, max_width=1200, image_format="webp", quality=80, max_workers=None):
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unsupported image format: {image_format}")
+        self.max_width = max_width
+        self.image_format = image_format
+        self.quality = quality
+        # Forking while download threads hold locks can leave the children deadlocked, so workers are spawned
+        self.executor = ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(),
+                                            mp_context=multiprocessing.get_context("spawn"))
+    
+    def submit(self, path):
+        """Queue a downloaded page; returns a future with its manifest entry"""
+        return self.executor.submit(process_page, path, self.max_width, self.image_format, self.quality)
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+class Manifest:
+    """Record of processed pages of a manga, stored as .manifest.json in its folder
+    
+    Maps chapter folder -> at-home file name -> output file and sizes, so a
+    resumed download knows a page is done even though its file was renamed.
+    """
+    
+    def __init__(self, manga_dir):
+        self.path = os.path.join(manga_dir, ".manifest.json")
+        self.lock = threading.Lock()
+        self.chapters = self.load()
+    
+    def load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                return {}
+        return {}
+    
+    def get(self, chapter_folder, page):
+        with self.lock:
+            return self.chapters.get(chapter_folder, {}).get(page)
+    
+    def record(self, chapter_folder, page, entry):
+        with self.lock:
+            self.chapters.setdefault(chapter_folder, {})[page] = entry
+    
+    def save(self):
+        with self.lock:
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(self.chapters, f)
+            os.replace(temp_path, self.path)
@@ -0,0 +1,155 @@
+import io
+import os
+import sys
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+# From Python 3.12 cProfile runs on sys.monitoring, which sees every thread but allows one active profiler
+PROCESS_WIDE_CPROFILE = sys.version_info >= (3, 12)
+
+
+class Profiler:
+    """Per-stage timers for the download path, with optional cProfile and tracemalloc sessions
+    
+    Stages are timed only while enabled, so the timers cost one attribute check
+    otherwise. A session collects the stage totals of one download, optionally
+    with cProfile stats of every thread and the memory allocated meanwhile, and
+    writes them to a text report.
+    """
+    
+    def __init__(self):
+        self.enabled = False
+        self.cpu = False
+        self.memory = False
+        self.lock = threading.Lock()
+        self.stages = {}  # Stage name -> [calls, total seconds, longest call]
+        self.profiles = []
+        self.session_start = None
+        self.memory_start = None
+    
+    def configure(self, enabled=True, cpu=False, memory=False):
+        self.enabled = enabled
+        self.cpu = enabled and cpu
+        self.memory = enabled and memory
+    
+    @contextmanager
+    def stage(self, name):
+        """Time a block as one call of a stage"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+    
+    def record(self, name, seconds, calls=1):
+        with self.lock:
+            stats = self.stages.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += calls
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds / calls)
+    
+    def start_session(self):
+        """Reset the stage totals and start the configured cProfile/tracemalloc captures"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.stages = {}
+            self.profiles = []
+        self.session_start = time.perf_counter()
+        if self.memory:
+            tracemalloc.start(10)
+            self.memory_start = tracemalloc.take_snapshot()
+        if self.cpu:
+            if PROCESS_WIDE_CPROFILE:
+                self._enable_profile()
+            else:
+                # cProfile only sees the thread it runs in; threads started from now on get their own
+                threading.setprofile(self._start_thread_profile)
+                self.profile_thread()
+    
+    def profile_thread(self):
+        """Profile the calling thread for the rest of the session (for QThreads, which skip threading hooks)
+        
+        Does nothing where one profiler already covers every thread.
+        """
+        if not self.cpu or self.session_start is None or PROCESS_WIDE_CPROFILE:
+            return
+        self._enable_profile()
+    
+    def _enable_profile(self):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Another profiler or debugger holds the hook; the stage timers still work
+            print(f"CPU profiling unavailable: {e}")
+            return
+        with self.lock:
+            self.profiles.append(profile)
+    
+    def _start_thread_profile(self, frame, event, arg):
+        sys.setprofile(None)
+        self.profile_thread()
+    
+    def stop_session(self, report_dir):
+        """Stop the captures and write the session's report to report_dir; returns the report path"""
+        if not self.enabled or self.session_start is None:
+            return None
+        elapsed = time.perf_counter() - self.session_start
+        self.session_start = None
+        threading.setprofile(None)
+        
+        name = time.strftime("profile-%Y%m%d-%H%M%S")
+        out = io.StringIO()
+        out.write(f"Download session: {elapsed:.2f} s\n\n")
+        out.write(f"{'Stage':<20}{'Calls':>8}{'Total s':>12}{'Mean ms':>12}{'Max ms':>12}\n")
+        with self.lock:
+            stages = sorted(self.stages.items(), key=lambda item: item[1][1], reverse=True)
+            profiles = self.profiles
+            self.profiles = []
+        for stage, (calls, total, longest) in stages:
+            out.write(f"{stage:<20}{calls:>8}{total:>12.3f}{total / calls * 1000:>12.2f}{longest * 1000:>12.2f}\n")
+        out.write("\nStages overlap when they run on several threads, so totals can exceed the session time.\n")
+        
+        if self.memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            out.write(f"\nMemory: {current / 1024 / 1024:.1f} MB allocated at the end, "
+                      f"{peak / 1024 / 1024:.1f} MB peak\n")
+            out.write("Largest growth since the session started:\n")
+            for stat in snapshot.compare_to(self.memory_start, "lineno")[:20]:
+                out.write(f"  {stat}\n")
+            self.memory_start = None
+        
+        os.makedirs(report_dir, exist_ok=True)
+        for profile in profiles:
+            profile.disable()
+        if profiles:
+            # The stats of each thread are merged; the raw stats can be opened with snakeviz and the like
+            try:
+                stats = pstats.Stats(*profiles, stream=out)
+            except (TypeError, ValueError) as e:
+                out.write(f"\nNo CPU profile was recorded: {e}\n")
+            else:
+                stats.dump_stats(os.path.join(report_dir, f"{name}.prof"))
+                out.write("\nCPU profile of all download threads (top 40 by cumulative time):\n")
+                stats.sort_stats("cumulative").print_stats(40)
+        elif self.cpu:
+            out.write("\nNo CPU profile was recorded.\n")
+        
+        report_path = os.path.join(report_dir, f"{name}.txt")
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write(out.getvalue())
+        return report_path
+
+
+# Shared by the API, the HTTP client and the download threads
+profiler = Profiler()
@@ -0,0 +1,134 @@
+import time
+import threading
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+
+class DownloadProgress:
+    """Thread-safe page and byte counters of all active transfers
+    
+    Download threads only bump counters here; the UI samples them at a fixed
+    rate, so progress costs no cross-thread signals per page or chunk.
+    """
+    
+    def __init__(self, smoothing=0.3):
+        self.smoothing = smoothing
+        self.lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        with self.lock:
+            self.pages_total = 0
+            self.pages_done = 0
+            self.pages_fetched = 0  # Pages that came over the network, for the average page size
+            self.bytes_received = 0
+            self.chapters = {}  # Chapter key -> label, for the chapters in progress
+            self.planned = {}  # Chapter key -> page count announced before the chapter started
+            self.started = set()
+            self.throughput = None
+            self.last_sample = (time.monotonic(), 0)
+    
+    def plan_chapters(self, page_counts):
+        """Count the pages of chapters that will be downloaded later, from a {key: page count} dict"""
+        with self.lock:
+            for key, total_pages in page_counts.items():
+                if key not in self.planned and key not in self.started:
+                    self.planned[key] = total_pages
+                    self.pages_total += total_pages
+    
+    def add_chapter(self, key, label, total_pages, done_pages=0):
+        with self.lock:
+            self.chapters[key] = label
+            self.started.add(key)
+            self.pages_total += total_pages - self.planned.pop(key, 0)
+            self.pages_done += done_pages
+    
+    def finish_chapter(self, key):
+        """Mark a chapter as done; the planned pages of a chapter that never started are dropped"""
+        with self.lock:
+            self.chapters.pop(key, None)
+            self.pages_total -= self.planned.pop(key, 0)
+            # A plan arriving after this, from a lookup still in flight, is ignored
+            self.started.add(key)
+    
+    def page_done(self, fetched=True):
+        with self.lock:
+            self.pages_done += 1
+            if fetched:
+                self.pages_fetched += 1
+    
+    def add_bytes(self, count):
+        with self.lock:
+            self.bytes_received += count
+    
+    def sample(self):
+        """Snapshot of the counters with smoothed throughput (bytes/s), ETA (seconds) and total bytes estimate
+        
+        The ETA and estimate are None until a page was received over the network.
+        """
+        now = time.monotonic()
+        with self.lock:
+            last_time, last_bytes = self.last_sample
+            elapsed = now - last_time
+            if elapsed > 0:
+                rate = (self.bytes_received - last_bytes) / elapsed
+                self.throughput = rate if self.throughput is None else (
+                    self.smoothing * rate + (1 - self.smoothing) * self.throughput)
+            self.last_sample = (now, self.bytes_received)
+            
+            # Remaining pages are estimated at the average size of the pages received so far
+            eta = None
+            bytes_estimate = None
+            remaining = max(self.pages_total - self.pages_done, 0)
+            if self.pages_fetched:
+                remaining_bytes = remaining * self.bytes_received / self.pages_fetched
+                bytes_estimate = self.bytes_received + remaining_bytes
+                if self.throughput:
+                    eta = remaining_bytes / self.throughput
+            if not remaining:
+                eta = 0
+            
+            return {
+                "pages_done": self.pages_done,
+                "pages_total": self.pages_total,
+                "bytes": self.bytes_received,
+                "bytes_estimate": bytes_estimate,
+                "throughput": self.throughput or 0.0,
+                "eta": eta,
+                "chapters": list(self.chapters.values()),
+            }
+
+
+class ProgressReporter(QObject):
+    """Samples a DownloadProgress on a GUI-thread timer and emits coalesced updates"""
+    updated = pyqtSignal(object)  # DownloadProgress.sample() snapshot
+    
+    def __init__(self, progress, interval=100, parent=None):
+        super().__init__(parent)
+        self.progress = progress
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)  # 10 Hz by default
+        self.timer.timeout.connect(self.report)
+    
+    def start(self):
+        self.timer.start()
+    
+    def stop(self):
+        self.timer.stop()
+        self.report()
+    
+    def report(self):
+        self.updated.emit(self.progress.sample())
+
+
+def format_bytes(count):
+    for unit in ("B", "KB", "MB", "GB"):
+        if count < 1024 or unit == "GB":
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
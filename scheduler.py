@@ -0,0 +1,102 @@
+import heapq
+import itertools
+import threading
+from download_control import DownloadCancelled
+
+
+class PageScheduler:
+    """Runs page fetches on a few worker threads in reading order
+    
+    Earlier chapters and earlier pages go first. A bumped chapter goes ahead of
+    the others, and the chapter a reader is waiting for goes ahead of everything,
+    so every worker picks up its pages before anything else.
+    """
+    WAITING = 0
+    BUMPED = 1
+    NORMAL = 2
+    
+    def __init__(self, workers=4, control=None):
+        self.workers = workers
+        self.control = control
+        self.condition = threading.Condition()
+        self.queue = []  # Heap of [priority, sequence, chapter key, page index, task]
+        self.sequence = itertools.count()
+        self.bumps = {}  # Chapter key -> bump order, later bumps first
+        self.bump_order = itertools.count(1)
+        self.waiting_chapter = None
+        self.active = 0
+        self.closed = False
+        self.threads = []
+    
+    def start(self):
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._worker, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+    
+    def submit(self, chapter_key, page_index, task):
+        """Queue task() as the fetch of one page of a chapter"""
+        with self.condition:
+            heapq.heappush(self.queue, [self.priority(chapter_key, page_index), next(self.sequence),
+                                        chapter_key, page_index, task])
+            self.condition.notify()
+    
+    def priority(self, chapter_key, page_index=0):
+        if chapter_key == self.waiting_chapter:
+            return (self.WAITING, 0, page_index)
+        if chapter_key in self.bumps:
+            return (self.BUMPED, -self.bumps[chapter_key], page_index)
+        return (self.NORMAL, chapter_key, page_index)
+    
+    def bump(self, chapter_key):
+        """Move a chapter ahead of the chapters that were not bumped"""
+        with self.condition:
+            self.bumps[chapter_key] = next(self.bump_order)
+            self._reprioritize()
+    
+    def set_waiting(self, chapter_key):
+        """Give a chapter the workers first; the chapter waited for before stays bumped"""
+        with self.condition:
+            if self.waiting_chapter is not None:
+                self.bumps[self.waiting_chapter] = next(self.bump_order)
+            self.waiting_chapter = chapter_key
+            self._reprioritize()
+    
+    def pending_count(self):
+        """Pages queued or being fetched"""
+        with self.condition:
+            return len(self.queue) + self.active
+    
+    def close(self):
+        """Drop the queued pages and let the workers exit once their current page is done"""
+        with self.condition:
+            self.closed = True
+            self.queue = []
+            self.condition.notify_all()
+    
+    def _reprioritize(self):
+        for entry in self.queue:
+            entry[0] = self.priority(entry[2], entry[3])
+        heapq.heapify(self.queue)
+    
+    def _worker(self):
+        while True:
+            with self.condition:
+                while not self.queue and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                task = heapq.heappop(self.queue)[4]
+                self.active += 1
+            
+            try:
+                if self.control:
+                    self.control.check()
+                task()
+            except DownloadCancelled:
+                self.close()
+            except Exception as e:
+                print(f"Error fetching page: {e}")
+            finally:
+                with self.condition:
+                    self.active -= 1
@@ -8,7 +8,18 @@ class Settings:
             "download_dir": os.path.expanduser("~/Downloads"),
             "download_as_pdf": False,
             "preferred_language": "en",
-            "content_ratings": ["safe", "suggestive"]
+            "content_ratings": ["safe", "suggestive"],
+            "http2": False,
+            "lean_json": True,
+            "preferred_groups": [],
+            "version_strategy": "newest",
+            "dedup_store": False,
+            "postprocess": False,
+            "postprocess_width": 1200,
+            "postprocess_format": "webp",
+            "postprocess_quality": 80,
+            "group_by_volume": False,
+            "page_workers": 4
         }
         self.settings = self.load_settings()
     
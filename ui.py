@@ -1,171 +1,503 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, 
-                             QPushButton, QRadioButton, QFileDialog, QScrollArea, 
+                             QPushButton, QRadioButton, QFileDialog, 
                              QButtonGroup, QDialog, QCheckBox, QProgressBar, QMessageBox,
-                             QComboBox)
-from PyQt5.QtCore import Qt, pyqtSignal, QSize, QThread, QObject
-from PyQt5.QtGui import QPixmap, QImage
-import requests
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+                             QComboBox, QListView, QAbstractItemView, QApplication,
+                             QStyledItemDelegate, QStyle, QInputDialog, QListWidget,
+                             QListWidgetItem, QMenu)
+from PyQt5.QtCore import (Qt, pyqtSignal, QSize, QThread, QObject, QAbstractListModel, QModelIndex,
+                          QRect, QEvent, QUrl, QTimer)
+from PyQt5.QtGui import (QPixmap, QImage, QColor, QFont, QFontMetrics, QPainter, QCursor,
+                         QDesktopServices)
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 import os
+import queue
 import threading
 import time
+from collections import deque
+from updates import FollowedSeries, UpdateChecker
+from http_client import get_client
+from models import Manga, Chapter
+from versions import VERSION_STRATEGIES, resolve_versions
+from download_control import DownloadControl, DownloadCancelled
+from scheduler import PageScheduler
+from progress import ProgressReporter, format_bytes, format_duration
+from library import LibraryScanner
+from profiling import profiler
 
-class MangaCard(QWidget):
-    download_clicked = pyqtSignal(dict)
+class CoverCache:
+    """Thread-safe in-memory cache of downloaded cover images"""
     
-    def __init__(self, manga_data):
-        super().__init__()
-        self.manga_data = manga_data
-        self.init_ui()
+    def __init__(self, max_items=500):
+        self.max_items = max_items
+        self.covers = {}
+        self.lock = threading.Lock()
+    
+    def get(self, url):
+        """Get cover image bytes, downloading them if they are not cached yet"""
+        with self.lock:
+            if url in self.covers:
+                return self.covers[url]
+        
+        response = get_client().get(url)
+        if response.status_code != 200:
+            return None
+        
+        with self.lock:
+            # Drop the oldest entries once the cache is full
+            while len(self.covers) >= self.max_items:
+                self.covers.pop(next(iter(self.covers)))
+            self.covers[url] = response.content
+        return response.content
+    
+    def prefetch(self, urls):
+        """Download covers in a background thread so cards can show them immediately"""
+        def prefetch_thread(urls):
+            for url in urls:
+                try:
+                    self.get(url)
+                except Exception as e:
+                    print(f"Error prefetching cover: {e}")
         
-    def init_ui(self):
-        self.layout = QHBoxLayout()
+        threading.Thread(target=prefetch_thread, args=(list(urls),), daemon=True).start()
+
+
+cover_cache = CoverCache()
+
+
+class MangaResultsModel(QAbstractListModel):
+    """List model of search results that loads covers lazily for the rows being painted"""
+    MangaDataRole = Qt.UserRole + 1
+    CoverRole = Qt.UserRole + 2
+    CoverFailedRole = Qt.UserRole + 3
+    
+    cover_ready = pyqtSignal(str, QImage)  # manga_id, scaled cover image
+    cover_failed = pyqtSignal(str)  # manga_id
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.manga = []
+        self.rows_by_id = {}
+        self.covers = {}
+        self.pending_covers = set()
+        self.failed_covers = set()
+        self.cover_executor = ThreadPoolExecutor(max_workers=4)
+        self.cover_ready.connect(self.on_cover_ready)
+        self.cover_failed.connect(self.on_cover_failed)
+    
+    def clear(self):
+        self.beginResetModel()
+        self.manga = []
+        self.rows_by_id = {}
+        self.covers = {}
+        self.pending_covers = set()
+        self.failed_covers = set()
+        self.endResetModel()
+    
+    def append_manga(self, manga_list):
+        """Append a page of results without touching the existing rows"""
+        if not manga_list:
+            return
+        
+        first = len(self.manga)
+        self.beginInsertRows(QModelIndex(), first, first + len(manga_list) - 1)
+        for row, manga in enumerate(manga_list, first):
+            self.manga.append(manga)
+            self.rows_by_id[manga.id] = row
+        self.endInsertRows()
+    
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.manga)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        
+        manga = self.manga[index.row()]
+        if role == Qt.DisplayRole:
+            return manga.title or "Unknown Title"
+        elif role == self.MangaDataRole:
+            return manga
+        elif role == self.CoverRole:
+            # Only covers of rows that are actually painted get requested
+            if manga.id not in self.covers and manga.id not in self.failed_covers:
+                self.request_cover(manga)
+            return self.covers.get(manga.id)
+        elif role == self.CoverFailedRole:
+            return manga.id in self.failed_covers
+        return None
+    
+    def request_cover(self, manga):
+        cover_url = manga.cover_url
+        if not cover_url or manga.id in self.pending_covers:
+            return
+        
+        self.pending_covers.add(manga.id)
+        self.cover_executor.submit(self.load_cover, manga.id, cover_url)
+    
+    def load_cover(self, manga_id, url):
+        """Download and scale a cover in a worker thread"""
+        try:
+            data = cover_cache.get(url)
+            img = QImage()
+            if data and img.loadFromData(data):
+                scaled_img = img.scaled(150, 200, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                self.cover_ready.emit(manga_id, scaled_img)
+                return
+        except Exception as e:
+            print(f"Error loading cover: {e}")
+        self.cover_failed.emit(manga_id)
+    
+    def on_cover_ready(self, manga_id, image):
+        """Store a loaded cover and repaint its row"""
+        if manga_id not in self.pending_covers:
+            return  # Results were cleared while the cover was loading
+        
+        self.pending_covers.discard(manga_id)
+        self.covers[manga_id] = QPixmap.fromImage(image)
+        row = self.rows_by_id.get(manga_id)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [self.CoverRole])
+    
+    def on_cover_failed(self, manga_id):
+        """Stop showing a cover as loading; it is requested again after the next search"""
+        if manga_id not in self.pending_covers:
+            return
+        
+        self.pending_covers.discard(manga_id)
+        self.failed_covers.add(manga_id)
+        row = self.rows_by_id.get(manga_id)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [self.CoverRole, self.CoverFailedRole])
+
+
+class MangaCardDelegate(QStyledItemDelegate):
+    """Paints a search result as a manga card with cover, info and a Download button"""
+    download_clicked = pyqtSignal(object)  # Manga
+    
+    CARD_HEIGHT = 220
+    COVER_WIDTH = 150
+    COVER_HEIGHT = 200
+    BUTTON_HEIGHT = 28
+    MARGIN = 10
+    
+    def __init__(self, view):
+        super().__init__(view)
+        self.view = view
+        self.title_font = QFont(view.font())
+        self.title_font.setBold(True)
+        self.tags_font = QFont(view.font())
+        self.tags_font.setItalic(True)
+    
+    def sizeHint(self, option, index):
+        grid_size = self.view.gridSize()
+        if grid_size.isValid():
+            return grid_size
+        return QSize(400, self.CARD_HEIGHT + self.MARGIN)
+    
+    def card_rect(self, rect):
+        return rect.adjusted(5, 5, -5, -5)
+    
+    def cover_rect(self, rect):
+        card = self.card_rect(rect)
+        return QRect(card.left() + self.MARGIN, card.top() + self.MARGIN, self.COVER_WIDTH, self.COVER_HEIGHT)
+    
+    def info_rect(self, rect):
+        card = self.card_rect(rect)
+        left = card.left() + self.COVER_WIDTH + 2 * self.MARGIN
+        return QRect(left, card.top() + self.MARGIN, card.right() - left - self.MARGIN, self.COVER_HEIGHT)
+    
+    def button_rect(self, rect):
+        info = self.info_rect(rect)
+        return QRect(info.left(), info.bottom() - self.BUTTON_HEIGHT + 1, info.width(), self.BUTTON_HEIGHT)
+    
+    def paint(self, painter, option, index):
+        manga = index.data(MangaResultsModel.MangaDataRole)
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        
+        # Card background
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor("#2c2c2c"))
+        painter.drawRoundedRect(self.card_rect(option.rect), 5, 5)
         
         # Cover image
-        cover_layout = QVBoxLayout()
-        self.cover_label = QLabel()
-        self.cover_label.setFixedSize(150, 200)
-        self.cover_label.setAlignment(Qt.AlignCenter)
-        self.cover_label.setStyleSheet("background-color: #1a1a1a; color: white;")
-        
-        # Info layout - create a fixed height container
-        info_container = QWidget()
-        info_container.setFixedHeight(200)  # Match the cover image height
-        info_layout = QVBoxLayout(info_container)
-        info_layout.setContentsMargins(0, 0, 0, 0)
-        
-        # Title
-        title = self.manga_data.get("attributes", {}).get("title", {}).get("en", "Unknown Title")
-        title_label = QLabel(f"<b>{title}</b>")
-        title_label.setWordWrap(True)
-        info_layout.addWidget(title_label)
-        
-        # Tags
-        tags = []
-        for tag in self.manga_data.get("attributes", {}).get("tags", []):
-            tag_name = tag.get("attributes", {}).get("name", {}).get("en")
-            if tag_name:
-                tags.append(tag_name)
-        
-        if tags:
-            tags_label = QLabel(f"<i>Tags: {', '.join(tags[:5])}</i>")
-            tags_label.setWordWrap(True)
-            info_layout.addWidget(tags_label)
-        
-        # Description
-        description = self.manga_data.get("attributes", {}).get("description", {}).get("en", "No description available.")
+        cover_rect = self.cover_rect(option.rect)
+        painter.setBrush(QColor("#1a1a1a"))
+        painter.drawRect(cover_rect)
+        pixmap = index.data(MangaResultsModel.CoverRole)
+        painter.setPen(QColor("white"))
+        if pixmap:
+            pixmap_rect = QRect(0, 0, pixmap.width(), pixmap.height())
+            pixmap_rect.moveCenter(cover_rect.center())
+            painter.drawPixmap(pixmap_rect, pixmap)
+        elif index.data(MangaResultsModel.CoverFailedRole):
+            painter.drawText(cover_rect, Qt.AlignCenter, "No Cover")
+        elif manga.cover_url:
+            painter.drawText(cover_rect, Qt.AlignCenter, "Loading...")
+        
+        # Title, tags and description, top to bottom
+        info_rect = self.info_rect(option.rect)
+        text_bottom = info_rect.bottom() - self.BUTTON_HEIGHT - 5
+        y = info_rect.top()
+        
+        title = manga.title or "Unknown Title"
+        y = self.draw_wrapped_text(painter, self.title_font, title, info_rect, y, text_bottom, 3)
+        
+        if manga.tags:
+            y = self.draw_wrapped_text(painter, self.tags_font, f"Tags: {', '.join(manga.tags[:5])}", 
+                                       info_rect, y, text_bottom, 2)
+        
+        description = manga.description or "No description available."
         if len(description) > 200:
             description = description[:200] + "..."
-        
-        desc_label = QLabel(description)
-        desc_label.setWordWrap(True)
-        info_layout.addWidget(desc_label)
-        
-        # Add stretch to push content to the top
-        info_layout.addStretch(1)
+        self.draw_wrapped_text(painter, option.font, description, info_rect, y, text_bottom)
         
         # Download button
-        download_btn = QPushButton("Download")
-        download_btn.clicked.connect(self.on_download_clicked)
-        info_layout.addWidget(download_btn)
-        
-        # Find cover art
-        cover_file = None
-        for relationship in self.manga_data.get("relationships", []):
-            if relationship.get("type") == "cover_art":
-                cover_file = relationship.get("attributes", {}).get("fileName")
-                break
+        button_rect = self.button_rect(option.rect)
+        cursor_pos = self.view.viewport().mapFromGlobal(QCursor.pos())
+        hovered = option.state & QStyle.State_MouseOver and button_rect.contains(cursor_pos)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor("#d46246" if hovered else "#c45236"))
+        painter.drawRoundedRect(button_rect, 3, 3)
+        painter.setPen(QColor("white"))
+        painter.setFont(option.font)
+        painter.drawText(button_rect, Qt.AlignCenter, "Download")
+        
+        painter.restore()
+    
+    def draw_wrapped_text(self, painter, font, text, info_rect, y, bottom, max_lines=None):
+        """Draw word-wrapped text starting at y and return the y below it"""
+        metrics = QFontMetrics(font)
+        flags = Qt.AlignLeft | Qt.AlignTop | Qt.TextWordWrap
+        height = metrics.boundingRect(QRect(0, 0, info_rect.width(), 10000), flags, text).height()
+        if max_lines:
+            height = min(height, metrics.lineSpacing() * max_lines)
+        height = min(height, bottom - y)
+        if height <= 0:
+            return y
+        
+        painter.setFont(font)
+        painter.drawText(QRect(info_rect.left(), y, info_rect.width(), height), flags, text)
+        return y + height + 5
+    
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton 
+                and self.button_rect(option.rect).contains(event.pos())):
+            self.download_clicked.emit(index.data(MangaResultsModel.MangaDataRole))
+            return True
+        return super().editorEvent(event, model, option, index)
+
+
+class MangaGridView(QListView):
+    """Responsive grid of manga cards that reflows by resizing its grid cells"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setViewMode(QListView.IconMode)
+        self.setFlow(QListView.LeftToRight)
+        self.setWrapping(True)
+        self.setResizeMode(QListView.Adjust)
+        self.setMovement(QListView.Static)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(50)
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setMouseTracking(True)
+        self.hovered_row = -1
+        self.update_grid_size()
+    
+    def get_column_count(self):
+        """Calculate number of columns based on width"""
+        width = self.viewport().width()
         
-        if cover_file:
-            manga_id = self.manga_data.get("id")
-            cover_url = f"https://uploads.mangadex.org/covers/{manga_id}/{cover_file}"
-            
-            # Create a loading placeholder
-            self.cover_label.setText("Loading...")
-            
-            # Create signal emitter for thread communication
-            class ImageSignalEmitter(QObject):
-                image_loaded = pyqtSignal(QPixmap)
-            
-            signal_emitter = ImageSignalEmitter()
-            signal_emitter.image_loaded.connect(self.set_cover_image)
-            
-            # Load image in a background thread
-            def load_image_thread(url, emitter):
-                try:
-                    # Create a session with retry capability
-                    session = requests.Session()
-                    retry_strategy = Retry(
-                        total=3,
-                        backoff_factor=1,
-                        status_forcelist=[429, 500, 502, 503, 504],
-                    )
-                    adapter = HTTPAdapter(max_retries=retry_strategy)
-                    session.mount("http://", adapter)
-                    session.mount("https://", adapter)
-                    
-                    response = session.get(url)
-                    if response.status_code == 200:
-                        img = QImage()
-                        img.loadFromData(response.content)
-                        pixmap = QPixmap.fromImage(img)
-                        scaled_pixmap = pixmap.scaled(150, 200, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                        emitter.image_loaded.emit(scaled_pixmap)
-                except Exception as e:
-                    print(f"Error loading cover: {e}")
-            
-            # Start the image loading thread
-            threading.Thread(target=load_image_thread, args=(cover_url, signal_emitter), daemon=True).start()
+        # Determine columns based on width breakpoints
+        if width < 600:
+            return 1
+        elif width < 900:
+            return 2
+        elif width < 1200:
+            return 3
+        else:
+            return 4
+    
+    def update_grid_size(self):
+        """Size grid cells so the cards fill the available columns"""
+        columns = self.get_column_count()
+        width = max(self.viewport().width() // columns, 1)
+        grid_size = QSize(width, MangaCardDelegate.CARD_HEIGHT + MangaCardDelegate.MARGIN)
+        if grid_size != self.gridSize():
+            self.setGridSize(grid_size)
+    
+    def resizeEvent(self, event):
+        self.update_grid_size()
+        super().resizeEvent(event)
+    
+    def mouseMoveEvent(self, event):
+        # Repaint the cards under the cursor so the button hover state follows it
+        index = self.indexAt(event.pos())
+        if index.row() != self.hovered_row and self.hovered_row >= 0:
+            self.update(self.model().index(self.hovered_row, 0))
+        self.hovered_row = index.row()
+        if index.isValid():
+            self.update(index)
+        super().mouseMoveEvent(event)
+
+
+class ChapterListModel(QAbstractListModel):
+    """List model of chapters, one row per chapter number, with checkable rows and downloaded/incomplete state"""
+    ChapterIdRole = Qt.UserRole + 1
+    ChapterDataRole = Qt.UserRole + 2
+    DownloadedRole = Qt.UserRole + 3
+    IncompleteRole = Qt.UserRole + 4
+    VersionsRole = Qt.UserRole + 5
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.chapters = []
+        self.versions = []
+        self.checked = bytearray()
+        self.downloaded_chapters = set()
+        self.incomplete_chapters = set()
+        self.anchor_row = None
+        self.downloaded_color = QColor("green")
+        self.incomplete_color = QColor("orange")
+    
+    def set_chapters(self, chapter_versions, downloaded_chapters=(), incomplete_chapters=()):
+        """Replace the chapter list with resolved ChapterVersions; incomplete chapters start checked"""
+        self.beginResetModel()
+        self.versions = chapter_versions
+        self.chapters = [versions.chosen for versions in chapter_versions]
+        self.downloaded_chapters = set(downloaded_chapters)
+        self.incomplete_chapters = set(incomplete_chapters)
+        self.checked = bytearray(
+            1 if chapter.number in self.incomplete_chapters
+            and chapter.number not in self.downloaded_chapters else 0
+            for chapter in self.chapters
+        )
+        self.anchor_row = None
+        self.endResetModel()
+    
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.chapters)
+    
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsUserCheckable
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        
+        row = index.row()
+        chapter = self.chapters[row]
+        chapter_num = chapter.number
+        
+        if role == Qt.DisplayRole:
+            text = f"Chapter {chapter_num}: {chapter.display_title} [{self.group_label(chapter)}]"
+            alternatives = len(self.versions[row].versions) - 1
+            if alternatives:
+                text += f" (+{alternatives} other version{'s' if alternatives > 1 else ''})"
+            if chapter_num in self.downloaded_chapters:
+                return f"✓ {text} (Already Downloaded)"
+            elif chapter_num in self.incomplete_chapters:
+                return f"⚠ {text} (Incomplete)"
+            return text
+        elif role == Qt.CheckStateRole:
+            return Qt.Checked if self.checked[row] else Qt.Unchecked
+        elif role == Qt.ForegroundRole:
+            if chapter_num in self.downloaded_chapters:
+                return self.downloaded_color
+            elif chapter_num in self.incomplete_chapters:
+                return self.incomplete_color
+        elif role == self.ChapterIdRole:
+            return chapter.id
+        elif role == self.ChapterDataRole:
+            return chapter
+        elif role == self.DownloadedRole:
+            return chapter_num in self.downloaded_chapters
+        elif role == self.IncompleteRole:
+            return chapter_num in self.incomplete_chapters
+        elif role == self.VersionsRole:
+            return self.versions[row].versions
+        return None
+    
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.CheckStateRole:
+            return False
         
-        cover_layout.addWidget(self.cover_label)
-        self.layout.addLayout(cover_layout)
-        self.layout.addWidget(info_container, 1)
+        row = index.row()
+        checked = value == Qt.Checked
         
-        self.setLayout(self.layout)
+        # Shift-clicking a checkbox applies the new state to the whole range since the last click
+        if self.anchor_row is not None and QApplication.keyboardModifiers() & Qt.ShiftModifier:
+            self.set_range_checked(min(self.anchor_row, row), max(self.anchor_row, row), checked)
+        else:
+            self.set_range_checked(row, row, checked)
         
-        # Style for manga card
-        self.setStyleSheet("""
-            QWidget {
-                background-color: #2c2c2c;
-                border-radius: 5px;
-                color: white;
-            }
-            QLabel {
-                color: white;
-            }
-            QPushButton {
-                background-color: #c45236;
-                color: white;
-                border: none;
-                padding: 5px;
-                border-radius: 3px;
-            }
-            QPushButton:hover {
-                background-color: #d46246;
-            }
-        """)
+        self.anchor_row = row
+        return True
     
-    def set_cover_image(self, pixmap):
-        """Set the cover image when loaded from the background thread"""
-        self.cover_label.setPixmap(pixmap)
+    def set_range_checked(self, first, last, checked):
+        """Check or uncheck rows first..last and notify the view once"""
+        if not self.chapters:
+            return
         
-    def on_download_clicked(self):
-        self.download_clicked.emit(self.manga_data)
+        first = max(first, 0)
+        last = min(last, len(self.chapters) - 1)
+        self.checked[first:last + 1] = bytes([1 if checked else 0]) * (last - first + 1)
+        self.dataChanged.emit(self.index(first), self.index(last), [Qt.CheckStateRole])
+    
+    def set_rows_checked(self, rows, checked):
+        """Check or uncheck an arbitrary set of rows"""
+        for row in rows:
+            self.checked[row] = 1 if checked else 0
+        if rows:
+            self.dataChanged.emit(self.index(min(rows)), self.index(max(rows)), [Qt.CheckStateRole])
+    
+    def set_version(self, row, chapter):
+        """Download another upload of the chapter in this row"""
+        self.versions[row].chosen = chapter
+        self.chapters[row] = chapter
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, self.ChapterIdRole, self.ChapterDataRole])
+    
+    def group_label(self, chapter):
+        return ", ".join(name for name in chapter.group_names if name) or "No Group"
+    
+    def checked_chapters(self):
+        """Get the Chapter record of every checked row"""
+        return [chapter for chapter, checked in zip(self.chapters, self.checked) if checked]
 
 
 class ChapterSelectionDialog(QDialog):
     def __init__(self, api, manga_id, preferred_language="en", parent=None, 
-                 downloaded_chapters=None, incomplete_chapters=None):
+                 downloaded_chapters=None, incomplete_chapters=None, followed=False,
+                 preferred_groups=(), version_strategy="newest", library=None, manga_title=None):
         super().__init__(parent)
         self.api = api
         self.manga_id = manga_id
+        # With a LibraryScanner the download state is read from memory along with the chapters
+        self.library = library
+        self.manga_title = manga_title
+        self.followed = followed
+        self.preferred_groups = preferred_groups
+        self.version_strategy = version_strategy
         self.preferred_language = preferred_language
-        self.chapters = {"data": []}
+        self.chapters = []
         self.selected_chapters = []
-        self.downloaded_chapters = downloaded_chapters or []
-        self.incomplete_chapters = incomplete_chapters or []
+        self.downloaded_chapters = downloaded_chapters or set()
+        self.incomplete_chapters = incomplete_chapters or set()
+        self.load_generation = 0
         
         # Set dialog style
         self.setStyleSheet("""
@@ -188,17 +520,18 @@ class ChapterSelectionDialog(QDialog):
                 color: white;
                 selection-background-color: #c45236;
             }
-            QScrollArea, QWidget#scrollContent {
+            QListView {
                 background-color: #191a1c;
                 color: white;
+                selection-background-color: #4f4f4f;
             }
-            QCheckBox {
-                color: white;
-            }
-            QCheckBox::indicator:checked {
+            QListView::indicator:checked, QCheckBox::indicator:checked {
                 background-color: #c45236;
                 border: 1px solid white;
             }
+            QCheckBox {
+                color: white;
+            }
             QPushButton {
                 background-color: #c45236;
                 color: white;
@@ -311,15 +644,45 @@ class ChapterSelectionDialog(QDialog):
         
         layout.addLayout(lang_layout)
         
-        # Chapter list
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_content = QWidget()
-        self.scroll_layout = QVBoxLayout(self.scroll_content)
-        self.scroll_area.setWidget(self.scroll_content)
-        
-        # Set the scroll area to take up more space
-        layout.addWidget(self.scroll_area, 1)
+        # Status message shown while loading or when there are no chapters
+        self.status_label = QLabel()
+        self.status_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.status_label)
+        
+        # Chapter list - only the visible rows are rendered
+        self.chapter_model = ChapterListModel(self)
+        self.chapter_view = QListView()
+        self.chapter_view.setModel(self.chapter_model)
+        self.chapter_view.setUniformItemSizes(True)
+        self.chapter_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.chapter_view.setSpacing(1)
+        
+        # Set the chapter list to take up more space
+        layout.addWidget(self.chapter_view, 1)
+        
+        # Scanlation group uploads of the current chapter; the list holds one of them per chapter
+        version_layout = QHBoxLayout()
+        version_layout.addWidget(QLabel("Version:"))
+        self.version_combo = QComboBox()
+        self.version_combo.setEnabled(False)
+        self.version_combo.activated.connect(self.on_version_selected)
+        version_layout.addWidget(self.version_combo, 1)
+        
+        self.strategy_combo = QComboBox()
+        self.strategy_combo.setToolTip("Which upload to pick when no preferred group has one")
+        for strategy, name in VERSION_STRATEGIES.items():
+            self.strategy_combo.addItem(name, strategy)
+        self.strategy_combo.setCurrentIndex(max(self.strategy_combo.findData(self.version_strategy), 0))
+        self.strategy_combo.currentIndexChanged.connect(self.on_strategy_changed)
+        version_layout.addWidget(self.strategy_combo)
+        layout.addLayout(version_layout)
+        
+        self.chapter_view.selectionModel().currentChanged.connect(self.update_version_combo)
+        
+        # Follow the series so "Check for Updates" finds its new chapters
+        self.follow_checkbox = QCheckBox("Follow this series for updates")
+        self.follow_checkbox.setChecked(self.followed)
+        layout.addWidget(self.follow_checkbox)
         
         # Buttons
         button_layout = QHBoxLayout()
@@ -328,6 +691,11 @@ class ChapterSelectionDialog(QDialog):
         select_all_btn.clicked.connect(self.select_all)
         button_layout.addWidget(select_all_btn)
         
+        select_highlighted_btn = QPushButton("Select Highlighted")
+        select_highlighted_btn.setToolTip("Check every highlighted chapter (use Shift/Ctrl-click to highlight a range)")
+        select_highlighted_btn.clicked.connect(self.select_highlighted)
+        button_layout.addWidget(select_highlighted_btn)
+        
         download_btn = QPushButton("Download")
         download_btn.clicked.connect(self.accept)
         button_layout.addWidget(download_btn)
@@ -340,144 +708,261 @@ class ChapterSelectionDialog(QDialog):
         self.setLayout(layout)
     
     def load_chapters(self, language_code):
-        # Clear previous chapters
-        while self.scroll_layout.count():
-            item = self.scroll_layout.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
-        
-        self.chapter_checkboxes = []
-        
-        # Show loading message
-        loading_label = QLabel("Loading chapters...")
-        loading_label.setAlignment(Qt.AlignCenter)
-        self.scroll_layout.addWidget(loading_label)
+        # Clear previous chapters and show loading message
+        self.chapter_model.set_chapters([])
+        self.update_version_combo()
+        self.status_label.setText("Loading chapters...")
+        self.status_label.setVisible(True)
+        self.load_generation += 1
         
         # Create signal emitter in the main thread
-        from PyQt5.QtCore import QObject, pyqtSignal
-        
         class SignalEmitter(QObject):
-            update_signal = pyqtSignal(object)
+            update_signal = pyqtSignal(int, object, object)
         
         signal_emitter = SignalEmitter()
-        signal_emitter.update_signal.connect(self.update_chapters_ui)
+        signal_emitter.update_signal.connect(self.on_chapters_loaded)
         
         # Load chapters in a separate thread to keep UI responsive
-        def fetch_chapters(emitter):
-            chapters = self.api.get_manga_chapters(self.manga_id, language_code)
+        def fetch_chapters(generation, emitter):
+            try:
+                feed = self.api.get_manga_chapters(self.manga_id, language_code)
+            except Exception as e:
+                print(f"Error loading chapters: {e}")
+                emitter.update_signal.emit(generation, None, None)
+                return
+            # Parse the records and pick a version of each chapter here rather than in the UI thread
+            chapters = resolve_versions([Chapter.from_api(chapter) for chapter in feed.get("data", [])],
+                                        self.preferred_groups, self.version_strategy)
+            # Page counts of the chosen versions tell complete chapter folders from incomplete ones
+            index = None
+            if self.library:
+                index = self.library.get_download_index(self.manga_title,
+                                                        [versions.chosen for versions in chapters])
             # Use signal to update UI in main thread
-            emitter.update_signal.emit(chapters)
+            emitter.update_signal.emit(generation, chapters, index)
         
         # Start thread with the emitter as an argument
-        threading.Thread(target=fetch_chapters, args=(signal_emitter,), daemon=True).start()
+        threading.Thread(target=fetch_chapters, args=(self.load_generation, signal_emitter), daemon=True).start()
+    
+    def on_chapters_loaded(self, generation, chapters, index=None):
+        # Ignore chapters of a language that is no longer selected
+        if generation == self.load_generation:
+            if chapters is None:
+                self.chapters = []
+                self.status_label.setText("Could not load chapters, check your connection and try again")
+                self.status_label.setVisible(True)
+                return
+            if index is not None:
+                self.downloaded_chapters = index.downloaded
+                self.incomplete_chapters = index.incomplete
+            self.update_chapters_ui(chapters)
     
     def update_chapters_ui(self, chapters):
-        # Remove loading label
-        while self.scroll_layout.count():
-            item = self.scroll_layout.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
-        
-        # Add chapters
         self.chapters = chapters
-        if not self.chapters.get("data", []):
-            no_chapters = QLabel(f"No chapters available in selected language")
-            no_chapters.setAlignment(Qt.AlignCenter)
-            self.scroll_layout.addWidget(no_chapters)
+        if not self.chapters:
+            self.chapter_model.set_chapters([])
+            self.update_version_combo()
+            self.status_label.setText("No chapters available in selected language")
+            self.status_label.setVisible(True)
             return
         
-        # Create a container widget to hold all checkboxes
-        container = QWidget()
-        container_layout = QVBoxLayout(container)
-        container_layout.setSpacing(2)  # Minimal spacing between items
-        container_layout.setContentsMargins(0, 0, 0, 0)  # Remove margins
-        
-        for chapter in self.chapters.get("data", []):
-            chapter_attrs = chapter.get("attributes", {})
-            chapter_num = chapter_attrs.get("chapter", "Unknown")
-            chapter_title = chapter_attrs.get("title", f"Chapter {chapter_num}")
-            
-            checkbox = QCheckBox(f"Chapter {chapter_num}: {chapter_title}")
-            checkbox.setProperty("chapter_id", chapter.get("id"))
-            checkbox.setProperty("chapter_data", chapter)
-            
-            # Mark as downloaded if it exists
-            if chapter_num in self.downloaded_chapters:
-                checkbox.setText(f"✓ Chapter {chapter_num}: {chapter_title} (Already Downloaded)")
-                checkbox.setStyleSheet("color: green;")
-            # Mark as incomplete if it exists but is incomplete
-            elif chapter_num in self.incomplete_chapters:
-                checkbox.setText(f"⚠ Chapter {chapter_num}: {chapter_title} (Incomplete)")
-                checkbox.setStyleSheet("color: orange;")
-                checkbox.setChecked(True)  # Auto-select incomplete chapters
-                
-            self.chapter_checkboxes.append(checkbox)
-            container_layout.addWidget(checkbox)
-        
-        # Add stretch at the end to push all chapters to the top with empty space below
-        container_layout.addStretch(1)
-        
-        # Add the container to the scroll area
-        self.scroll_layout.addWidget(container)
-    
-
+        self.status_label.setVisible(False)
+        self.chapter_model.set_chapters(self.chapters, self.downloaded_chapters, self.incomplete_chapters)
+        self.update_version_combo()
     
     def on_language_changed(self, index):
         language_code = self.language_combo.itemData(index)
         self.load_chapters(language_code)
     
+    def on_strategy_changed(self, index):
+        self.version_strategy = self.strategy_combo.itemData(index)
+        self.load_chapters(self.get_selected_language())
+    
+    def update_version_combo(self, *args):
+        """Show the uploads of the current chapter so another one can be picked"""
+        self.version_combo.clear()
+        index = self.chapter_view.currentIndex()
+        if not index.isValid():
+            self.version_combo.setEnabled(False)
+            return
+        
+        chosen = index.data(ChapterListModel.ChapterDataRole)
+        for chapter in index.data(ChapterListModel.VersionsRole):
+            pages = f"{chapter.pages} pages" if chapter.pages else "external"
+            uploaded = (chapter.published_at or "")[:10]
+            self.version_combo.addItem(f"{self.chapter_model.group_label(chapter)} - {pages}, {uploaded}", chapter)
+            if chapter is chosen:
+                self.version_combo.setCurrentIndex(self.version_combo.count() - 1)
+        self.version_combo.setEnabled(self.version_combo.count() > 1)
+    
+    def on_version_selected(self, combo_index):
+        index = self.chapter_view.currentIndex()
+        if index.isValid():
+            self.chapter_model.set_version(index.row(), self.version_combo.itemData(combo_index))
+    
+    def get_version_strategy(self):
+        return self.version_strategy
+    
     def select_all(self):
-        for checkbox in self.chapter_checkboxes:
-            checkbox.setChecked(True)
+        self.chapter_model.set_range_checked(0, self.chapter_model.rowCount() - 1, True)
+    
+    def select_highlighted(self):
+        rows = [index.row() for index in self.chapter_view.selectionModel().selectedIndexes()]
+        self.chapter_model.set_rows_checked(rows, True)
     
     def get_selected_chapters(self):
-        selected = []
-        for checkbox in self.chapter_checkboxes:
-            if checkbox.isChecked():
-                chapter_id = checkbox.property("chapter_id")
-                chapter_data = checkbox.property("chapter_data")
-                selected.append((chapter_id, chapter_data))
-        return selected
+        return self.chapter_model.checked_chapters()
     
     def get_selected_language(self):
         return self.language_combo.itemData(self.language_combo.currentIndex())
+    
+    def is_follow_checked(self):
+        return self.follow_checkbox.isChecked()
 
 
 class DownloadThread(QThread):
-    progress_updated = pyqtSignal(int, int, str, str)  # current, total, manga_title, chapter_title
     chapter_updated = pyqtSignal(int, int, str)   # current chapter, total chapters, manga_title
     download_finished = pyqtSignal(list)     # list of downloaded paths
     
-    def __init__(self, api, chapter_data_list, manga_title, download_dir, as_pdf):
+    def __init__(self, api, chapters, manga_title, download_dir, as_pdf, group_by_volume=False, page_workers=4):
         super().__init__()
         self.api = api
-        self.chapter_data_list = chapter_data_list
+        self.chapters = chapters
         self.manga_title = manga_title
         self.download_dir = download_dir
         self.as_pdf = as_pdf
-        self.api_connected = False
+        self.group_by_volume = group_by_volume
+        self.page_workers = page_workers
+        self.control = DownloadControl()
+        self.scheduler = PageScheduler(page_workers, self.control)
+        self.finished_chapters = set()
     
     def run(self):
-        # Connect signals in the same thread
-        if not self.api_connected:
-            self.api.download_progress.connect(self.on_download_progress)
-            self.api_connected = True
-            
+        # Page progress is counted in api.progress and sampled by the GUI, not sent per page
         downloaded_paths = []
-        for i, (chapter_id, chapter_data) in enumerate(self.chapter_data_list):
-            path = self.api.download_chapter(chapter_id, self.manga_title, self.download_dir, chapter_data, self.as_pdf)
-            if path:
-                downloaded_paths.append(path)
+        jobs = {}
+        unprepared = list(range(len(self.chapters)))
+        finished = queue.Queue()  # (chapter index, job) once all pages of a chapter were tried
+        profiler.start_session()
+        
+        # Look up every chapter's at-home server and page list up front, so preparing a
+        # chapter rarely waits for the at-home rate limit and the page total is known early
+        threading.Thread(target=self.prefetch_chapters, daemon=True).start()
+        self.scheduler.start()
+        try:
+            while len(self.finished_chapters) < len(self.chapters):
+                self.control.check()
+                
+                # Look up the next chapters once the workers are running low on pages, so
+                # at-home server assignments are fresh and a bumped chapter is next in line
+                while unprepared and self.scheduler.pending_count() < self.page_workers * 2:
+                    index = min(unprepared, key=self.scheduler.priority)
+                    unprepared.remove(index)
+                    chapter = self.chapters[index]
+                    
+                    # While the API is failing, wait for its circuit breaker to allow a probe
+                    # instead of failing every remaining chapter
+                    self.api.wait_for_host(self.api.base_url, should_stop=lambda: self.control.cancelled)
+                    self.control.check()
+                    
+                    job = self.api.prepare_chapter(chapter.id, self.manga_title, self.download_dir, chapter,
+                                                   self.as_pdf, self.control)
+                    if job:
+                        jobs[index] = job
+                        self.schedule_pages(index, job, finished)
+                    else:
+                        self.api.progress.finish_chapter(chapter.id)
+                        finished.put((index, None))
+                
+                try:
+                    index, job = finished.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                
+                path = self.api.finalize_chapter(job) if job else False
+                if path:
+                    downloaded_paths.append(path)
+                    if self.group_by_volume:
+                        self.api.add_to_volume(self.manga_title, self.download_dir, self.chapters[index], path)
+                
+                # Update chapter progress
+                self.finished_chapters.add(index)
+                self.chapter_updated.emit(len(self.finished_chapters), len(self.chapters), self.manga_title)
+        except DownloadCancelled:
+            # Finished pages and .part files stay on disk, downloading the chapters again resumes them
+            pass
+        finally:
+            self.scheduler.close()
+            for index, job in jobs.items():
+                if index not in self.finished_chapters:
+                    self.api.collect_processed_pages(job)
             
-            # Update chapter progress
-            self.chapter_updated.emit(i + 1, len(self.chapter_data_list), self.manga_title)
+            # With --profile, the session's report goes next to the downloads
+            report_path = profiler.stop_session(self.download_dir)
+            if report_path:
+                print(f"Profile written to {report_path}")
         
         self.download_finished.emit(downloaded_paths)
     
-    def on_download_progress(self, current, total, manga_title, chapter_title):
-        self.progress_updated.emit(current, total, manga_title, chapter_title)
+    def prefetch_chapters(self):
+        # Chapters already on disk need no at-home lookup, which would spend the 40 per minute budget
+        self.api.prefetch_at_home(
+            [chapter.id for chapter in self.chapters
+             if not self.api.has_output(self.manga_title, self.download_dir, chapter, self.as_pdf)],
+            should_stop=lambda: self.control.cancelled,
+            on_found=lambda chapter_id, page_count: self.api.progress.plan_chapters({chapter_id: page_count})
+        )
+    
+    def schedule_pages(self, index, job, finished):
+        """Queue the missing pages of a chapter; the chapter goes to finished after its last page"""
+        pending = job.pending_pages()
+        if not pending:
+            finished.put((index, job))
+            return
+        
+        remaining = [len(pending)]
+        lock = threading.Lock()
+        
+        def fetch(page_index):
+            try:
+                self.api.fetch_page(job, page_index)
+            finally:
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    finished.put((index, job))
+        
+        for page_index in pending:
+            self.scheduler.submit(index, page_index, lambda page_index=page_index: fetch(page_index))
+    
+    def pause(self):
+        self.control.pause()
+    
+    def resume(self):
+        self.control.resume()
+    
+    def cancel(self):
+        self.control.cancel()
+    
+    def is_paused(self):
+        return self.control.is_paused
+    
+    def is_cancelled(self):
+        return self.control.cancelled
+    
+    def read_first(self, index):
+        """Fetch this chapter before all others, as a reader is waiting for it"""
+        self.scheduler.set_waiting(index)
+    
+    def bump(self, index):
+        """Move a chapter ahead of the chapters that were not bumped"""
+        self.scheduler.bump(index)
+    
+    def unfinished_chapters(self):
+        """(index, chapter) of the chapters that are not done yet"""
+        return [(index, chapter) for index, chapter in enumerate(self.chapters)
+                if index not in self.finished_chapters]
 
 
 class ImageDownloadDialog(QDialog):
@@ -547,6 +1032,27 @@ class MangadexGUI(QWidget):
         self.search_results = []
         self.current_manga = None
         self.download_thread = None
+        self.download_queue = deque()
+        self.completed_downloads = []
+        self.followed = FollowedSeries()
+        self.update_checker = UpdateChecker(api, self.followed)
+        
+        # Downloaded chapters of the library, scanned in the background and kept in memory
+        self.library = LibraryScanner(api, self.download_dir)
+        self.library.rescan()
+        
+        # Coalesced page/byte progress of the running download, about 10 updates a second
+        self.progress_reporter = ProgressReporter(api.progress, 100, self)
+        self.progress_reporter.updated.connect(self.update_download_progress)
+        
+        # Paging state for infinite scroll
+        self.page_size = 20
+        self.search_query = ""
+        self.search_generation = 0
+        self.search_total = 0
+        self.next_offset = 0
+        self.loading_page = False
+        self.prefetched_pages = {}
         
         # Set application style
         self.setStyleSheet("""
@@ -557,7 +1063,7 @@ class MangadexGUI(QWidget):
             QLabel {
                 color: white;
             }
-            QLineEdit, QComboBox, QScrollArea {
+            QLineEdit, QComboBox, QListView {
                 background-color: #2c2c2c;
                 color: white;
                 border: 1px solid #4f4f4f;
@@ -567,6 +1073,9 @@ class MangadexGUI(QWidget):
             QComboBox {
                 background-color: #4f4f4f;
             }
+            QListView {
+                background-color: #191a1c;
+            }
             QComboBox QAbstractItemView {
                 background-color: #4f4f4f;
                 color: white;
@@ -582,7 +1091,7 @@ class MangadexGUI(QWidget):
             QPushButton:hover {
                 background-color: #d46246;
             }
-            QRadioButton {
+            QRadioButton, QCheckBox {
                 color: white;
             }
             QRadioButton::indicator {
@@ -634,12 +1143,22 @@ class MangadexGUI(QWidget):
         
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Enter manga title...")
+        # The local index is queried once typing pauses, not on every keystroke
+        self.local_search_timer = QTimer(self)
+        self.local_search_timer.setSingleShot(True)
+        self.local_search_timer.setInterval(200)
+        self.local_search_timer.timeout.connect(lambda: self.update_local_results(self.search_input.text()))
+        self.search_input.textChanged.connect(self.local_search_timer.start)
         search_bar_layout.addWidget(self.search_input, 1)
         
         self.search_button = QPushButton("Search")
         self.search_button.clicked.connect(self.search_manga)
         search_bar_layout.addWidget(self.search_button)
         
+        self.updates_button = QPushButton("Check for Updates")
+        self.updates_button.clicked.connect(self.check_for_updates)
+        search_bar_layout.addWidget(self.updates_button)
+        
         search_layout.addLayout(search_bar_layout)
         
         # Download options
@@ -674,22 +1193,51 @@ class MangadexGUI(QWidget):
         self.download_type.addButton(self.images_radio)
         type_layout.addWidget(self.images_radio)
         
+        self.volume_checkbox = QCheckBox("Also merge into volumes")
+        self.volume_checkbox.setToolTip("Build one CBZ (images) or PDF per volume in the manga's Volumes folder")
+        self.volume_checkbox.setChecked(self.settings.get("group_by_volume", False))
+        type_layout.addWidget(self.volume_checkbox)
+        
         options_layout.addLayout(type_layout)
         
         search_layout.addLayout(options_layout)
         main_layout.addWidget(search_segment)
         
-        # Segment 2: Search results
-        results_label = QLabel("Search Results:")
-        main_layout.addWidget(results_label)
-        
-        self.results_area = QScrollArea()
-        self.results_area.setWidgetResizable(True)
-        self.results_widget = QWidget()
-        self.results_layout = QVBoxLayout(self.results_widget)
-        self.results_area.setWidget(self.results_widget)
-        
-        main_layout.addWidget(self.results_area, 1)
+        # Segment 2: Matches from the local metadata index, shown while typing and offline
+        self.local_results_label = QLabel("Seen Before:")
+        self.local_results_label.setVisible(False)
+        main_layout.addWidget(self.local_results_label)
+        
+        self.local_results_list = QListWidget()
+        self.local_results_list.setMaximumHeight(110)
+        self.local_results_list.setVisible(False)
+        self.local_results_list.itemActivated.connect(self.open_local_result)
+        self.local_results_list.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.local_results_list.customContextMenuRequested.connect(self.show_local_result_menu)
+        main_layout.addWidget(self.local_results_list)
+        
+        # Segment 3: Search results
+        self.results_label = QLabel("Search Results:")
+        main_layout.addWidget(self.results_label)
+        
+        self.results_model = MangaResultsModel(self)
+        self.results_view = MangaGridView()
+        self.results_view.setModel(self.results_model)
+        self.card_delegate = MangaCardDelegate(self.results_view)
+        self.card_delegate.download_clicked.connect(self.show_chapter_selection)
+        self.results_view.setItemDelegate(self.card_delegate)
+        
+        # Load further pages as the user nears the bottom of the results
+        self.results_view.verticalScrollBar().valueChanged.connect(self.on_results_scrolled)
+        self.results_view.verticalScrollBar().rangeChanged.connect(self.on_results_range_changed)
+        
+        main_layout.addWidget(self.results_view, 1)
+        
+        # Status shown while searching, loading more or when nothing was found
+        self.results_status_label = QLabel()
+        self.results_status_label.setAlignment(Qt.AlignCenter)
+        self.results_status_label.setVisible(False)
+        main_layout.addWidget(self.results_status_label)
         
         # Download progress bar
         progress_layout = QVBoxLayout()
@@ -711,9 +1259,36 @@ class MangadexGUI(QWidget):
         
         progress_layout.addLayout(progress_info_layout)
         
+        progress_bar_layout = QHBoxLayout()
+        
         self.chapter_progress_bar = QProgressBar()
         self.chapter_progress_bar.setVisible(False)
-        progress_layout.addWidget(self.chapter_progress_bar)
+        progress_bar_layout.addWidget(self.chapter_progress_bar, 1)
+        
+        self.read_first_button = QPushButton("Read First...")
+        self.read_first_button.setToolTip("Pick a chapter to download before all others")
+        self.read_first_button.clicked.connect(self.read_chapter_first)
+        self.read_first_button.setVisible(False)
+        progress_bar_layout.addWidget(self.read_first_button)
+        
+        self.bump_button = QPushButton("Move to Front...")
+        self.bump_button.setToolTip("Pick a chapter to download next, after the one picked with Read First")
+        self.bump_button.clicked.connect(self.bump_chapter)
+        self.bump_button.setVisible(False)
+        progress_bar_layout.addWidget(self.bump_button)
+        
+        self.pause_button = QPushButton("Pause")
+        self.pause_button.clicked.connect(self.toggle_pause)
+        self.pause_button.setVisible(False)
+        progress_bar_layout.addWidget(self.pause_button)
+        
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setToolTip("Stop the download and drop the queued ones; downloading again resumes where it stopped")
+        self.cancel_button.clicked.connect(self.cancel_downloads)
+        self.cancel_button.setVisible(False)
+        progress_bar_layout.addWidget(self.cancel_button)
+        
+        progress_layout.addLayout(progress_bar_layout)
         
         main_layout.addLayout(progress_layout)
         
@@ -721,168 +1296,313 @@ class MangadexGUI(QWidget):
         
         # Progress dialog for individual chapter download
         self.progress_dialog = None
+        
+        # Tell the user when a host stops responding
+        self.api.host_state_changed.connect(self.on_host_state_changed)
     
     def search_manga(self):
         query = self.search_input.text().strip()
         if not query:
             return
         
+        # Start a new search; results of older searches still in flight are ignored
+        self.search_query = query
+        self.search_generation += 1
+        self.search_total = 0
+        self.next_offset = 0
+        self.loading_page = True
+        self.prefetched_pages = {}
+        self.search_results = []
+        
         # Clear previous results
-        while self.results_layout.count():
-            item = self.results_layout.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
+        self.results_model.clear()
         
         # Show loading message
-        loading_label = QLabel("Searching...")
-        loading_label.setAlignment(Qt.AlignCenter)
-        self.results_layout.addWidget(loading_label)
+        self.results_label.setText("Search Results:")
+        self.set_results_status("Searching...")
         
+        self.fetch_search_page(0, self.display_search_results)
+    
+    def update_local_results(self, text):
+        """List the indexed manga matching the search text; the index answers in milliseconds"""
+        self.local_results_list.clear()
+        results = self.api.search_local(text.strip(), limit=10)["data"] if text.strip() else []
+        for data in results:
+            manga = Manga.from_api(data)
+            title = manga.title or "Unknown Manga"
+            folder = self.get_library_folder(title)
+            item = QListWidgetItem(f"{title}  —  {folder}" if folder else title)
+            item.setData(Qt.UserRole, manga)
+            item.setData(Qt.UserRole + 1, folder)
+            item.setToolTip(f"Downloaded to {folder}" if folder else "Not downloaded yet")
+            self.local_results_list.addItem(item)
+        
+        self.local_results_label.setText(f"Seen Before: {len(results)}")
+        self.local_results_label.setVisible(bool(results))
+        self.local_results_list.setVisible(bool(results))
+    
+    def get_library_folder(self, manga_title):
+        """Folder of a manga in the download directory, or None if the library scan did not find it"""
+        if not self.library.is_scanned(manga_title):
+            return None
+        return os.path.join(self.download_dir, self.api._sanitize_filename(manga_title))
+    
+    def open_local_result(self, item):
+        self.show_chapter_selection(item.data(Qt.UserRole))
+    
+    def show_local_result_menu(self, position):
+        item = self.local_results_list.itemAt(position)
+        if item is None:
+            return
+        
+        menu = QMenu(self)
+        menu.addAction("Download Chapters...", lambda: self.open_local_result(item))
+        folder = item.data(Qt.UserRole + 1)
+        if folder:
+            menu.addAction("Open Library Folder",
+                           lambda: QDesktopServices.openUrl(QUrl.fromLocalFile(folder)))
+        menu.exec_(self.local_results_list.mapToGlobal(position))
+    
+    def fetch_search_page(self, offset, callback):
+        """Fetch a page of search results in a background thread and pass it to callback"""
         # Create signal emitter for thread communication
         class SignalEmitter(QObject):
-            search_complete = pyqtSignal(object)
+            search_complete = pyqtSignal(int, int, object)
         
         signal_emitter = SignalEmitter()
-        signal_emitter.search_complete.connect(self.display_search_results)
+        signal_emitter.search_complete.connect(callback)
         
         # Run search in a separate thread
-        def search_thread(query, emitter):
+        def search_thread(query, generation, offset, emitter):
             # Get content ratings from settings
             content_ratings = self.settings.get("content_ratings", ["safe", "suggestive"])
-            results = self.api.search_manga(query, content_ratings=content_ratings)
-            emitter.search_complete.emit(results)
+            results = self.api.search_manga(query, limit=self.page_size, offset=offset,
+                                            content_ratings=content_ratings)
+            if results.get("error"):
+                # None tells the callback the page could not be fetched, rather than being empty
+                emitter.search_complete.emit(generation, offset, None)
+                return
+            # Parse the records here rather than in the UI thread
+            results = dict(results, data=[Manga.from_api(manga) for manga in results.get("data", [])])
+            emitter.search_complete.emit(generation, offset, results)
         
         # Start the search thread
-        threading.Thread(target=search_thread, args=(query, signal_emitter), daemon=True).start()
-    
-    def display_search_results(self, results):
-        # Clear loading message
-        while self.results_layout.count():
-            item = self.results_layout.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
-        
-        self.search_results = results.get("data", [])
-        
-        if not self.search_results:
-            no_results = QLabel("No results found.")
-            no_results.setAlignment(Qt.AlignCenter)
-            self.results_layout.addWidget(no_results)
+        threading.Thread(target=search_thread, 
+                         args=(self.search_query, self.search_generation, offset, signal_emitter), 
+                         daemon=True).start()
+    
+    def display_search_results(self, generation, offset, results):
+        if generation != self.search_generation:
             return
         
-        # Create a grid layout for responsive cards
-        self.grid_container = QWidget()
-        self.grid_layout = QHBoxLayout(self.grid_container)
-        self.grid_layout.setSpacing(10)
+        self.loading_page = False
         
-        # Create a list to store all cards
-        self.manga_cards = []
+        # The index now also holds this search's results
+        self.update_local_results(self.search_input.text())
         
-        # Create all cards first
-        for manga in self.search_results:
-            card = MangaCard(manga)
-            card.download_clicked.connect(self.show_chapter_selection)
-            self.manga_cards.append(card)
+        if results is None:
+            self.set_results_status("Search failed, check your connection and try again.")
+            return
+        if not results.get("data", []):
+            self.set_results_status("No results found.")
+            return
+        
+        self.append_search_results(generation, offset, results)
+    
+    def append_search_results(self, generation, offset, results):
+        """Add a page of search results to the grid without rebuilding existing cards"""
+        if generation != self.search_generation:
+            return
+        
+        self.loading_page = False
+        if results is None:
+            # Leave the offset where it is, so scrolling down again retries the page
+            self.set_results_status("Could not load more results, scroll down to try again.")
+            return
+        self.set_results_status(None)
         
-        # Arrange cards in the grid
-        self.arrange_cards()
+        page = results.get("data", [])
+        self.search_total = results.get("total", len(self.search_results) + len(page))
+        self.next_offset = offset + self.page_size
+        if not page:
+            # The API reported more results than it returned, stop paging
+            self.search_total = len(self.search_results)
         
-        # Add the grid container to the results layout
-        self.results_layout.addWidget(self.grid_container)
+        self.search_results.extend(page)
+        self.results_model.append_manga(page)
         
-        # Add stretch at the end to push all results to the top
-        self.results_layout.addStretch(1)
+        self.results_label.setText(f"Search Results: {len(self.search_results)} of {self.search_total}")
         
-        # Connect resize event to rearrange cards
-        self.results_area.resizeEvent = self.on_resize
+        self.prefetch_next_page()
+    
+    def set_results_status(self, text):
+        """Show a status message below the results, or hide it when text is None"""
+        self.results_status_label.setText(text or "")
+        self.results_status_label.setVisible(bool(text))
+    
+    def has_more_results(self):
+        return self.next_offset < self.search_total
+    
+    def load_next_page(self):
+        """Show the next page of results, using the prefetched page if it is ready"""
+        if self.loading_page or not self.has_more_results():
+            return
+        
+        offset = self.next_offset
+        if offset in self.prefetched_pages:
+            if self.prefetched_pages[offset] is None:
+                # The prefetch is still in flight and shows the page when it arrives
+                self.loading_page = True
+                self.set_results_status("Loading more...")
+            else:
+                self.append_search_results(self.search_generation, offset, self.prefetched_pages.pop(offset))
+            return
+        
+        self.loading_page = True
+        self.set_results_status("Loading more...")
+        self.fetch_search_page(offset, self.append_search_results)
+    
+    def prefetch_next_page(self):
+        """Fetch the next page and its covers in the background before the user reaches it"""
+        offset = self.next_offset
+        if not self.has_more_results() or offset in self.prefetched_pages:
+            return
+        
+        def store_prefetched_page(generation, offset, results):
+            if generation != self.search_generation:
+                return
+            
+            # The user may have scrolled to the bottom while the page was loading
+            if self.loading_page and offset == self.next_offset:
+                self.prefetched_pages.pop(offset, None)
+                self.append_search_results(generation, offset, results)
+                return
+            
+            # A failed prefetch counts as not prefetched; the page is fetched again on scroll
+            if results is None:
+                self.prefetched_pages.pop(offset, None)
+                return
+            
+            self.prefetched_pages[offset] = results
+            cover_cache.prefetch(manga.cover_url for manga in results.get("data", []) if manga.cover_url)
+        
+        self.prefetched_pages[offset] = None
+        self.fetch_search_page(offset, store_prefetched_page)
+    
+    def on_results_scrolled(self, value):
+        """Load the next page when the user scrolls near the bottom of the results"""
+        scroll_bar = self.results_view.verticalScrollBar()
+        if value >= scroll_bar.maximum() - 400:
+            self.load_next_page()
+    
+    def on_results_range_changed(self, minimum, maximum):
+        """Keep loading pages while the results do not fill the view yet"""
+        if maximum == 0 and self.search_results:
+            self.load_next_page()
     
     def select_directory(self):
         dir_path = QFileDialog.getExistingDirectory(self, "Select Download Directory", self.download_dir)
         if dir_path:
             self.download_dir = dir_path
             self.dir_label.setText(dir_path)
+            self.library.set_root(dir_path)
             # Save to settings
             self.settings.set("download_dir", dir_path)
     
-    def show_chapter_selection(self, manga_data):
-        self.current_manga = manga_data
-        manga_id = manga_data.get("id")
-        manga_title = manga_data.get("attributes", {}).get("title", {}).get("en", "Unknown Manga")
+    def show_chapter_selection(self, manga):
+        self.current_manga = manga
+        manga_id = manga.id
+        manga_title = manga.title or "Unknown Manga"
         
         # Get preferred language from settings
         preferred_language = self.settings.get("preferred_language", "en")
         
-        try:
-            # Get already downloaded and incomplete chapters
-            downloaded_chapters, incomplete_chapters = self.api.get_downloaded_chapters(
-                manga_title, self.download_dir, manga_id
-            )
-        except Exception as e:
-            print(f"Error getting downloaded chapters: {e}")
-            downloaded_chapters, incomplete_chapters = [], []
-        
+        # Downloaded and incomplete chapters come from the library scan, off the GUI thread
         dialog = ChapterSelectionDialog(
             self.api, manga_id, preferred_language, self, 
-            downloaded_chapters, incomplete_chapters
+            None, None, self.followed.is_followed(manga_id),
+            self.settings.get("preferred_groups", []), self.settings.get("version_strategy", "newest"),
+            self.library, manga_title
         )
         if dialog.exec_():
+            if dialog.is_follow_checked():
+                self.followed.follow(manga_id, manga_title, dialog.get_selected_language())
+            else:
+                self.followed.unfollow(manga_id)
+            
             selected_chapters = dialog.get_selected_chapters()
             if selected_chapters:
                 # Save selected language to settings
                 selected_language = dialog.get_selected_language()
                 self.settings.set("preferred_language", selected_language)
                 
-                # Save download type preference
+                # Save download type and version preferences
                 self.settings.set("download_as_pdf", self.pdf_radio.isChecked())
+                self.settings.set("group_by_volume", self.volume_checkbox.isChecked())
+                self.settings.set("version_strategy", dialog.get_version_strategy())
                 
                 self.download_chapters(selected_chapters)
     
-    def download_chapters(self, chapter_data_list):
-        if not chapter_data_list:
+    def download_chapters(self, chapters, manga_title=None):
+        if not chapters:
             return
             
         # Get manga title
-        manga_title = self.current_manga.get("attributes", {}).get("title", {}).get("en", "Unknown Manga")
+        if manga_title is None:
+            manga_title = self.current_manga.title or "Unknown Manga"
+        
+        # Queue the chapters if another download is still running
+        if self.download_thread and self.download_thread.isRunning():
+            self.download_queue.append((chapters, manga_title))
+            # Look up the queued chapters now so the batch starts without a gap
+            as_pdf = self.pdf_radio.isChecked()
+            chapter_ids = [chapter.id for chapter in chapters
+                           if not self.api.has_output(manga_title, self.download_dir, chapter, as_pdf)]
+            threading.Thread(target=self.api.prefetch_at_home, args=(chapter_ids,), daemon=True).start()
+            return
         
         # Setup progress bar
-        self.chapter_progress_bar.setMaximum(len(chapter_data_list))
+        self.chapter_progress_bar.setMaximum(len(chapters))
         self.chapter_progress_bar.setValue(0)
         
         # Update the individual progress labels
-        self.chapter_progress_label.setText(f"Chapters 0/{len(chapter_data_list)}")
+        self.chapter_progress_label.setText(f"Chapters 0/{len(chapters)}")
         self.manga_title_label.setText(manga_title)
         self.image_progress_label.setText("Images 0/0")
         
         self.chapter_progress_bar.setVisible(True)
+        self.pause_button.setText("Pause")
+        self.set_download_buttons_visible(True)
         
         # Create and start download thread
         self.download_thread = DownloadThread(
             self.api, 
-            chapter_data_list, 
+            chapters, 
             manga_title, 
             self.download_dir, 
-            self.pdf_radio.isChecked()
+            self.pdf_radio.isChecked(),
+            self.volume_checkbox.isChecked(),
+            self.settings.get("page_workers", 4)
         )
         
         # Connect signals
-        self.download_thread.progress_updated.connect(self.update_download_progress)
         self.download_thread.chapter_updated.connect(self.update_chapter_progress)
         self.download_thread.download_finished.connect(self.download_complete)
         
         # Start download
+        self.api.progress.reset()
         self.download_thread.start()
+        self.progress_reporter.start()
     
-    def update_download_progress(self, current, total, manga_title, chapter_title):
-        # Get current chapter progress
-        chapter_current = self.chapter_progress_bar.value()
-        chapter_total = self.chapter_progress_bar.maximum()
-        
-        # Update the individual progress labels
-        self.chapter_progress_label.setText(f"Chapters {chapter_current}/{chapter_total}")
-        self.manga_title_label.setText(manga_title)
-        self.image_progress_label.setText(f"Images {current}/{total}")
+    def update_download_progress(self, snapshot):
+        text = f"Images {snapshot['pages_done']}/{snapshot['pages_total']}"
+        if snapshot["bytes_estimate"]:
+            text += f" · {format_bytes(snapshot['bytes'])} of ~{format_bytes(snapshot['bytes_estimate'])}"
+        if snapshot["throughput"] >= 1:
+            text += f" · {format_bytes(snapshot['throughput'])}/s"
+        if snapshot["eta"]:
+            text += f" · {format_duration(snapshot['eta'])} left"
+        self.image_progress_label.setText(text)
     
     def update_chapter_progress(self, current, total, manga_title):
         self.chapter_progress_bar.setMaximum(total)
@@ -891,65 +1611,168 @@ class MangadexGUI(QWidget):
         # Update the individual progress labels
         self.chapter_progress_label.setText(f"Chapters {current}/{total}")
         self.manga_title_label.setText(manga_title)
-        self.image_progress_label.setText("Images 0/0")
     
     def download_complete(self, downloaded_paths):
+        # The signal is sent at the very end of run(), let the thread finish
+        self.download_thread.wait()
+        self.progress_reporter.stop()
+        # Pages were added inside chapter folders, which are not watched
+        self.library.rescan(self.download_thread.manga_title)
+        self.completed_downloads.append((self.download_thread.manga_title, len(downloaded_paths),
+                                         len(self.download_thread.chapters)))
+        
+        if self.download_thread.is_cancelled():
+            self.set_download_buttons_visible(False)
+            self.completed_downloads = []
+            self.manga_title_label.setText("Download cancelled")
+            return
+        
+        # Start the next queued download, if any
+        if self.download_queue:
+            chapters, manga_title = self.download_queue.popleft()
+            self.download_chapters(chapters, manga_title)
+            return
+        
         # Show completion message
-        manga_dir = os.path.join(self.download_dir, self.api._sanitize_filename(
-            self.current_manga.get("attributes", {}).get("title", {}).get("en", "Unknown Manga")
-        ))
-        QMessageBox.information(self, "Download Complete", 
-                               f"All {len(downloaded_paths)} chapters downloaded to:\n{manga_dir}")
+        if len(self.completed_downloads) == 1:
+            manga_title, count, total = self.completed_downloads[0]
+            manga_dir = os.path.join(self.download_dir, self.api._sanitize_filename(manga_title))
+            if count == total:
+                QMessageBox.information(self, "Download Complete", 
+                                       f"All {count} chapters downloaded to:\n{manga_dir}")
+            else:
+                QMessageBox.warning(self, "Download Incomplete",
+                                    f"{count} of {total} chapters downloaded to:\n{manga_dir}\n\n"
+                                    f"Download the others again to resume them.")
+        else:
+            count = sum(count for _, count, _ in self.completed_downloads)
+            QMessageBox.information(self, "Download Complete", 
+                                   f"{count} chapters of {len(self.completed_downloads)} series downloaded to:\n"
+                                   f"{self.download_dir}")
+        self.completed_downloads = []
         
         # Update progress bar text
         self.manga_title_label.setText("Download complete!")
+        self.set_download_buttons_visible(False)
+    
+    def set_download_buttons_visible(self, visible):
+        self.read_first_button.setVisible(visible)
+        self.bump_button.setVisible(visible)
+        self.pause_button.setVisible(visible)
+        self.cancel_button.setVisible(visible)
+    
+    def read_chapter_first(self):
+        """Let the user pick a chapter of the running download to fetch before all others"""
+        index = self.pick_unfinished_chapter("Read First", "Download this chapter first:")
+        if index is not None:
+            self.download_thread.read_first(index)
+    
+    def bump_chapter(self):
+        """Let the user pick a chapter of the running download to move ahead of the queued ones"""
+        index = self.pick_unfinished_chapter("Move to Front", "Download this chapter next:")
+        if index is not None:
+            self.download_thread.bump(index)
+    
+    def pick_unfinished_chapter(self, title, prompt):
+        """Ask for a chapter of the running download that is not done yet; returns its index or None"""
+        if not self.download_thread or not self.download_thread.isRunning():
+            return None
+        
+        chapters = self.download_thread.unfinished_chapters()
+        if not chapters:
+            return None
+        
+        labels = [chapter.folder_name for _, chapter in chapters]
+        label, ok = QInputDialog.getItem(self, title, prompt, labels, 0, False)
+        return chapters[labels.index(label)][0] if ok else None
+    
+    def toggle_pause(self):
+        """Pause the running download, releasing its connections, or resume it"""
+        if not self.download_thread or not self.download_thread.isRunning():
+            return
+        
+        if self.download_thread.is_paused():
+            self.download_thread.resume()
+            self.pause_button.setText("Pause")
+            self.manga_title_label.setText(self.download_thread.manga_title)
+        else:
+            self.download_thread.pause()
+            self.pause_button.setText("Resume")
+            self.manga_title_label.setText(f"{self.download_thread.manga_title} (paused)")
+    
+    def cancel_downloads(self):
+        """Stop the running download and drop the queued ones"""
+        self.download_queue.clear()
+        if self.download_thread and self.download_thread.isRunning():
+            self.download_thread.cancel()
+            self.manga_title_label.setText("Cancelling...")
+    
+    def on_host_state_changed(self, host, state):
+        if state == "open":
+            self.manga_title_label.setText(f"{host} is not responding, retrying shortly...")
+        elif state == "closed" and self.download_thread and self.download_thread.isRunning():
+            self.manga_title_label.setText(self.download_thread.manga_title)
+    
+    def check_for_updates(self):
+        """Look for new chapters of followed series in the background"""
+        if not self.followed.get_all():
+            QMessageBox.information(self, "Check for Updates", 
+                                   "You are not following any series yet. Tick \"Follow this series for updates\" "
+                                   "in the chapter selection dialog to follow one.")
+            return
         
-    def on_resize(self, event):
-        """Handle resize events to rearrange manga cards responsively"""
-        if hasattr(self, 'manga_cards'):
-            self.arrange_cards()
-        # Call the original resize event handler
-        super(MangadexGUI, self).resizeEvent(event)
+        self.updates_button.setEnabled(False)
+        self.updates_button.setText("Checking...")
         
-    def arrange_cards(self):
-        """Arrange manga cards in a responsive grid based on window width"""
-        if not hasattr(self, 'manga_cards') or not self.manga_cards:
+        # Create signal emitter for thread communication
+        class SignalEmitter(QObject):
+            check_complete = pyqtSignal(object)
+        
+        signal_emitter = SignalEmitter()
+        signal_emitter.check_complete.connect(self.on_updates_checked)
+        
+        def check_thread(emitter):
+            try:
+                result = self.update_checker.check()
+            except Exception as e:
+                print(f"Error checking for updates: {e}")
+                result = None
+            emitter.check_complete.emit(result)
+        
+        threading.Thread(target=check_thread, args=(signal_emitter,), daemon=True).start()
+    
+    def on_updates_checked(self, result):
+        self.updates_button.setEnabled(True)
+        self.updates_button.setText("Check for Updates")
+        
+        if result is None:
+            QMessageBox.warning(self, "Check for Updates", "Could not check for updates.")
+            return
+        updates, failed = result
+        failed_note = f"\n\n{len(failed)} series could not be checked and will be checked again next time." \
+            if failed else ""
+        if not updates:
+            if failed:
+                QMessageBox.warning(self, "Check for Updates", f"No new chapters found.{failed_note}")
+            else:
+                QMessageBox.information(self, "Check for Updates", "No new chapters.")
             return
-            
-        # Clear the current layout
-        while self.grid_layout.count():
-            item = self.grid_layout.takeAt(0)
-            if item.widget():
-                item.widget().setParent(None)
-                
-        # Calculate number of columns based on width
-        width = self.results_area.width()
         
-        # Determine columns based on width breakpoints
-        if width < 600:
-            columns = 1
-        elif width < 900:
-            columns = 2
-        elif width < 1200:
-            columns = 3
-        else:
-            columns = 4
-            
-        # Create column layouts
-        column_layouts = []
-        for i in range(columns):
-            column_widget = QWidget()
-            column_layout = QVBoxLayout(column_widget)
-            column_layout.setContentsMargins(5, 5, 5, 5)
-            column_layout.setSpacing(10)
-            column_layouts.append((column_widget, column_layout))
-            self.grid_layout.addWidget(column_widget)
-            
-        # Distribute cards among columns
-        for i, card in enumerate(self.manga_cards):
-            column_index = i % columns
-            column_layouts[column_index][1].addWidget(card)
-            
-        # Add stretch to each column to push cards to the top
-        for _, layout in column_layouts:
-            layout.addStretch(1)
\ No newline at end of file
+        count = sum(len(chapters) for _, chapters in updates.values())
+        series = "\n".join(f"{title}: {len(chapters)}" for title, chapters in updates.values())
+        answer = QMessageBox.question(self, "Check for Updates", 
+                                      f"Found {count} new chapters:\n{series}{failed_note}\n\nDownload them now?")
+        if answer == QMessageBox.Yes:
+            preferred_groups = self.settings.get("preferred_groups", [])
+            version_strategy = self.settings.get("version_strategy", "newest")
+            for title, chapters in updates.values():
+                chapter_versions = resolve_versions([Chapter.from_api(chapter) for chapter in chapters],
+                                                    preferred_groups, version_strategy)
+                # Chapters only hosted on an external site have no pages to download
+                hosted = [versions.chosen for versions in chapter_versions if not versions.chosen.external_url]
+                if hosted:
+                    self.download_chapters(hosted, title)
+        
+    def arrange_cards(self):
+        """Reflow the manga cards for the current window width"""
+        self.results_view.update_grid_size()
@@ -0,0 +1,157 @@
+import os
+import json
+import threading
+from datetime import datetime, timezone
+
+
+def utc_timestamp(dt=None):
+    """Format a datetime (default: now) the way the MangaDex API expects in queries"""
+    dt = dt or datetime.now(timezone.utc)
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def parse_timestamp(value):
+    """Parse an API or stored timestamp into an aware UTC datetime"""
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+class FollowedSeries:
+    """Series followed for updates, with the time each was last checked
+    
+    Thread-safe: the GUI thread follows and unfollows series while the update
+    checker's background thread records when they were last checked.
+    """
+    
+    def __init__(self):
+        self.followed_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "followed.json")
+        self.lock = threading.RLock()
+        self.followed = self.load_followed()
+    
+    def load_followed(self):
+        if os.path.exists(self.followed_file):
+            try:
+                with open(self.followed_file, "r") as f:
+                    return json.load(f)
+            except:
+                return {}
+        return {}
+    
+    def save_followed(self):
+        with self.lock:
+            with open(self.followed_file, "w") as f:
+                json.dump(self.followed, f, indent=2)
+    
+    def is_followed(self, manga_id):
+        with self.lock:
+            return manga_id in self.followed
+    
+    def follow(self, manga_id, title, language="en", last_seen=None):
+        """Follow a series; only chapters published after last_seen count as new"""
+        with self.lock:
+            entry = self.followed.get(manga_id, {})
+            entry.update({
+                "title": title,
+                "language": language,
+                "last_seen": entry.get("last_seen") or last_seen or utc_timestamp(),
+            })
+            self.followed[manga_id] = entry
+            self.save_followed()
+    
+    def unfollow(self, manga_id):
+        with self.lock:
+            if self.followed.pop(manga_id, None) is not None:
+                self.save_followed()
+    
+    def get_all(self):
+        """Copy of the followed series, safe to read while they change"""
+        with self.lock:
+            return {manga_id: dict(entry) for manga_id, entry in self.followed.items()}
+    
+    def set_last_seen(self, manga_ids, timestamp):
+        with self.lock:
+            for manga_id in manga_ids:
+                if manga_id in self.followed:
+                    self.followed[manga_id]["last_seen"] = timestamp
+            self.save_followed()
+
+
+class UpdateChecker:
+    """Finds new chapters of followed series with a few batched /chapter queries"""
+    
+    def __init__(self, api, followed):
+        self.api = api
+        self.followed = followed
+    
+    def check(self, batch_size=100):
+        """Check all followed series for new chapters
+        
+        Returns (updates, failed): a dict of manga id to (title, list of new
+        chapters sorted by chapter number), leaving out series without new
+        chapters, and the set of manga ids that could not be checked.
+        """
+        check_started = utc_timestamp()
+        followed = self.followed.get_all()
+        
+        # The language filter applies to a whole query, so series are batched per language
+        by_language = {}
+        for manga_id, entry in followed.items():
+            by_language.setdefault(entry.get("language", "en"), []).append(manga_id)
+        
+        updates = {}
+        failed = set()
+        for language, manga_ids in by_language.items():
+            # Batch series with similar last-seen times together so each query's
+            # updatedAtSince window stays small
+            manga_ids.sort(key=lambda manga_id: followed[manga_id].get("last_seen", ""))
+            for i in range(0, len(manga_ids), batch_size):
+                batch = manga_ids[i:i + batch_size]
+                since = min(followed[manga_id].get("last_seen") or check_started for manga_id in batch)
+                
+                chapters, batch_failed = self.api.get_chapter_updates(batch, since, [language], batch_size)
+                failed.update(batch_failed)
+                for chapter in chapters:
+                    manga_id = self._get_manga_id(chapter)
+                    if manga_id in followed and self._is_new(chapter, followed[manga_id].get("last_seen")):
+                        updates.setdefault(manga_id, []).append(chapter)
+        
+        # Series that could not be checked keep their last-seen time, so the next check still finds their chapters
+        self.followed.set_last_seen([manga_id for manga_id in followed if manga_id not in failed], check_started)
+        
+        return {
+            manga_id: (followed[manga_id].get("title", "Unknown Manga"), sorted(chapters, key=self._chapter_sort_key))
+            for manga_id, chapters in updates.items()
+        }, failed
+    
+    def _get_manga_id(self, chapter):
+        for relationship in chapter.get("relationships", []):
+            if relationship.get("type") == "manga":
+                return relationship.get("id")
+        return None
+    
+    def _is_new(self, chapter, last_seen):
+        """A chapter is new if it was uploaded or became readable after last_seen"""
+        last_seen = parse_timestamp(last_seen)
+        if last_seen is None:
+            return True
+        
+        attrs = chapter.get("attributes", {})
+        for key in ("createdAt", "publishAt", "readableAt"):
+            timestamp = parse_timestamp(attrs.get(key))
+            if timestamp and timestamp > last_seen:
+                return True
+        return False
+    
+    def _chapter_sort_key(self, chapter):
+        chapter_num = chapter.get("attributes", {}).get("chapter")
+        try:
+            return (0, float(chapter_num))
+        except (TypeError, ValueError):
+            return (1, 0.0)
@@ -0,0 +1,73 @@
+from updates import parse_timestamp
+
+VERSION_STRATEGIES = {
+    "newest": "Newest upload",
+    "most_pages": "Most pages",
+}
+
+
+class ChapterVersions:
+    """All uploads of one chapter number, with the version that will be downloaded"""
+    __slots__ = ("number", "chosen", "versions")
+    
+    def __init__(self, number, chosen, versions):
+        self.number = number
+        self.chosen = chosen
+        self.versions = versions
+    
+    @property
+    def alternatives(self):
+        return [chapter for chapter in self.versions if chapter is not self.chosen]
+
+
+def version_key(chapter):
+    """Key that groups uploads of the same chapter from different scanlation groups"""
+    if chapter.number is None:
+        # Oneshots and extras have no number; only their titles can tell them apart
+        return (None, chapter.title)
+    return (chapter.number, None)
+
+
+def pick_version(versions, preferred_groups=(), strategy="newest"):
+    """Pick the version to download
+    
+    Uploads by the first matching preferred group (id or name, case-insensitive)
+    win; otherwise the strategy decides. Hosted uploads always beat external links.
+    """
+    preferred = [group.lower() for group in preferred_groups]
+    
+    def group_rank(chapter):
+        names = [name.lower() for name in chapter.group_ids + chapter.group_names if name]
+        for rank, group in enumerate(preferred):
+            if group in names:
+                return rank
+        return len(preferred)
+    
+    if strategy == "most_pages":
+        def strategy_key(chapter):
+            return (-chapter.pages, -_upload_time(chapter))
+    else:
+        def strategy_key(chapter):
+            return (-_upload_time(chapter), -chapter.pages)
+    
+    return min(versions, key=lambda chapter: (chapter.external_url is not None and not chapter.pages,
+                                              group_rank(chapter), strategy_key(chapter)))
+
+
+def resolve_versions(chapters, preferred_groups=(), strategy="newest"):
+    """Group chapters by number and pick one version of each, in chapter order"""
+    groups = {}
+    for chapter in chapters:
+        groups.setdefault(version_key(chapter), []).append(chapter)
+    
+    resolved = [
+        ChapterVersions(versions[0].number, pick_version(versions, preferred_groups, strategy), versions)
+        for versions in groups.values()
+    ]
+    resolved.sort(key=lambda chapter_versions: chapter_versions.chosen.sort_key())
+    return resolved
+
+
+def _upload_time(chapter):
+    published_at = parse_timestamp(chapter.published_at)
+    return published_at.timestamp() if published_at else 0.0
@@ -0,0 +1,187 @@
+import os
+import re
+import json
+import zipfile
+import threading
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.avif', '.gif')
+# Volume PDFs carry their chapter keys and page counts in this document info entry
+PDF_CONTENTS_KEY = "/VolumeChapters"
+# Pages of a volume PDF made before it carried its contents; sorts after every chapter key
+UNKNOWN_CHAPTERS = "~~unknown"
+
+
+def page_order_key(filename):
+    """Order at-home page names ("x2-...", "x10-...") by their page number"""
+    match = re.match(r"\D*(\d+)", filename)
+    return (int(match.group(1)) if match else float("inf"), filename)
+
+
+def chapter_order_key(number):
+    """Zero-padded chapter number that sorts correctly as text, as used in archive entry names
+    
+    The fraction is always present ("00001.000", "00001.500"), so "00001.500/001.png"
+    sorts after "00001.000/..." in a CBZ; "." would sort before the "/" of a bare "00001/".
+    """
+    whole, _, fraction = str(number).partition(".")
+    if not whole.isdigit():
+        return f"~{number}"
+    return f"{whole.zfill(5)}.{fraction.ljust(3, '0')}"
+
+
+class VolumeArchiver:
+    """Merges downloaded chapters into one CBZ or PDF per volume without decoding pages
+    
+    Archives live in <manga dir>/Volumes. Adding a chapter updates its volume in
+    place: CBZ entries are appended, PDF page objects are copied in (needs pypdf).
+    Volumes/.volumes.json records which chapters each archive holds and where;
+    if it is lost, the record is rebuilt from the archives themselves.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+    
+    def add_chapter(self, manga_dir, chapter, chapter_path):
+        """Add a downloaded chapter folder or PDF to its volume archive; returns the archive path or None"""
+        if not chapter.volume:
+            return None  # Chapters without a volume stay as they are
+        
+        volumes_dir = os.path.join(manga_dir, "Volumes")
+        os.makedirs(volumes_dir, exist_ok=True)
+        
+        with self.lock:
+            index = self._load_index(volumes_dir)
+            if chapter_path.lower().endswith(".pdf"):
+                archive_path = os.path.join(volumes_dir, f"Volume {chapter.volume}.pdf")
+                added = self._add_to_pdf(archive_path, index, chapter, chapter_path)
+            else:
+                archive_path = os.path.join(volumes_dir, f"Volume {chapter.volume}.cbz")
+                added = self._add_to_cbz(archive_path, index, chapter, chapter_path)
+            if not added:
+                return None
+            self._save_index(volumes_dir, index)
+        return archive_path
+    
+    def _add_to_cbz(self, archive_path, index, chapter, chapter_dir):
+        pages = sorted((f for f in os.listdir(chapter_dir) if f.lower().endswith(IMAGE_EXTENSIONS)),
+                       key=page_order_key)
+        if not pages:
+            return False
+        
+        # Entry names sort in reading order, so chapters can be appended in any order
+        key = chapter_order_key(chapter.number)
+        contents = self._get_contents(index, archive_path)
+        if contents.get(key) == len(pages):
+            return True  # Already in the volume
+        if key in contents:
+            self._remove_cbz_entries(archive_path, f"{key}/")
+        
+        # Pages are already compressed images; store them as they are
+        with zipfile.ZipFile(archive_path, "a", compression=zipfile.ZIP_STORED) as archive:
+            for number, page in enumerate(pages, 1):
+                extension = os.path.splitext(page)[1].lower()
+                archive.write(os.path.join(chapter_dir, page), f"{key}/{number:03d}{extension}")
+        contents[key] = len(pages)
+        return True
+    
+    def _remove_cbz_entries(self, archive_path, prefix):
+        """Rewrite an archive without one chapter, copying the other entries' stored bytes"""
+        temp_path = f"{archive_path}.tmp"
+        with zipfile.ZipFile(archive_path) as source, \
+                zipfile.ZipFile(temp_path, "w", compression=zipfile.ZIP_STORED) as target:
+            for info in source.infolist():
+                if not info.filename.startswith(prefix):
+                    target.writestr(info, source.read(info))
+        os.replace(temp_path, archive_path)
+    
+    def _add_to_pdf(self, archive_path, index, chapter, chapter_pdf):
+        try:
+            from pypdf import PdfReader, PdfWriter
+        except ImportError:
+            print("Install pypdf to merge PDF chapters into volumes")
+            return False
+        
+        key = chapter_order_key(chapter.number)
+        page_count = len(PdfReader(chapter_pdf).pages)
+        contents = self._get_contents(index, archive_path)
+        if contents.get(key) == page_count:
+            return True  # Already in the volume
+        
+        writer = PdfWriter(clone_from=archive_path) if contents else PdfWriter()
+        
+        # Page position of the chapter from the page counts of the chapters before it
+        position = sum(count for other, count in contents.items() if other < key)
+        if key in contents:
+            for page_number in reversed(range(position, position + contents[key])):
+                del writer.pages[page_number]
+        
+        writer.merge(position, chapter_pdf, import_outline=False)
+        contents[key] = page_count
+        writer.add_metadata({PDF_CONTENTS_KEY: json.dumps(contents)})
+        temp_path = f"{archive_path}.tmp"
+        with open(temp_path, "wb") as f:
+            writer.write(f)
+        os.replace(temp_path, archive_path)
+        return True
+    
+    def _get_contents(self, index, archive_path):
+        """Chapter keys and page counts of an archive, reset if the archive was deleted"""
+        name = os.path.basename(archive_path)
+        if not os.path.exists(archive_path):
+            index[name] = {}
+        elif name not in index:
+            index[name] = self._read_contents(archive_path)
+        
+        # Archives made before keys always had a fraction use "00001" for chapter 1
+        renamed = {key: chapter_order_key(key) if key[:1].isdigit() else key for key in index[name]}
+        if any(key != new_key for key, new_key in renamed.items()):
+            if archive_path.lower().endswith(".cbz"):
+                self._rename_cbz_entries(archive_path, renamed)
+            index[name] = {renamed[key]: count for key, count in index[name].items()}
+        return index[name]
+    
+    def _rename_cbz_entries(self, archive_path, renamed):
+        """Rewrite an archive with its chapter folders renamed, copying the entries' stored bytes"""
+        temp_path = f"{archive_path}.tmp"
+        with zipfile.ZipFile(archive_path) as source, \
+                zipfile.ZipFile(temp_path, "w", compression=zipfile.ZIP_STORED) as target:
+            for info in source.infolist():
+                data = source.read(info)
+                key, _, page = info.filename.partition("/")
+                if page and key in renamed:
+                    info.filename = f"{renamed[key]}/{page}"
+                target.writestr(info, data)
+        os.replace(temp_path, archive_path)
+    
+    def _read_contents(self, archive_path):
+        """Rebuild the chapter keys and page counts of an existing archive missing from the index"""
+        contents = {}
+        if archive_path.lower().endswith(".cbz"):
+            with zipfile.ZipFile(archive_path) as archive:
+                for name in archive.namelist():
+                    key, _, page = name.partition("/")
+                    if page:
+                        contents[key] = contents.get(key, 0) + 1
+            return contents
+        
+        from pypdf import PdfReader
+        reader = PdfReader(archive_path)
+        try:
+            contents = json.loads((reader.metadata or {}).get(PDF_CONTENTS_KEY) or "{}")
+        except ValueError:
+            contents = {}
+        if not isinstance(contents, dict) or sum(contents.values()) != len(reader.pages):
+            # Keep the pages as one block that new chapters are merged in front of
+            contents = {UNKNOWN_CHAPTERS: len(reader.pages)} if reader.pages else {}
+        return contents
+    
+    def _load_index(self, volumes_dir):
+        try:
+            with open(os.path.join(volumes_dir, ".volumes.json"), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_index(self, volumes_dir, index):
+        with open(os.path.join(volumes_dir, ".volumes.json"), "w") as f:
+            json.dump(index, f)